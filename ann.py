@@ -0,0 +1,233 @@
+"""Approximate nearest-neighbor index over the movie tag vectors.
+
+    python ann.py build --clusters 64       # ann_index.npz
+    python ann.py benchmark --k 10          # recall@K and latency vs exact search
+
+The index is an inverted file (IVF): movies are bucketed by the nearest of a
+few spherical k-means centroids, and a query only scores the movies in its
+closest buckets. Build and query cost grow roughly with N·√N instead of N².
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+
+from catalog import find_movies, read_movies
+from features import normalize_rows, vectorize_tags
+from recommender import top_k_indices
+
+
+class IVFIndex:
+    """Serve recommendations by searching an inverted-file index of L2-normalized tag vectors."""
+
+    def __init__(self, vectors, centroids, order, offsets, nprobe=8, max_k=500):
+        self.vectors = sparse.csr_matrix(vectors)
+        self.centroids = centroids
+        # Rows grouped by bucket: bucket c holds order[offsets[c]:offsets[c + 1]]
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.max_results = max_k
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def max_k(self):
+        return min(self.max_results, max(len(self) - 1, 0))
+
+    @classmethod
+    def build(cls, vectors, clusters=64, iterations=10, nprobe=8, max_k=500, seed=0, block_size=4096):
+        """Cluster the rows of a (sparse) feature matrix with spherical k-means."""
+        vectors = normalize_rows(vectors)
+        n = vectors.shape[0]
+        clusters = max(1, min(clusters, n))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, clusters, replace=False)].toarray()
+
+        for _ in range(iterations):
+            assignment = cls._assign(vectors, centroids, block_size)
+            members = sparse.csr_matrix(
+                (np.ones(n, dtype=np.float32), (assignment, np.arange(n))), shape=(clusters, n)
+            )
+            sums = np.asarray((members @ vectors).todense())
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty buckets keep their previous centroid
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+
+        assignment = cls._assign(vectors, centroids, block_size)
+        order = np.argsort(assignment, kind="stable").astype(np.int32)
+        offsets = np.searchsorted(assignment[order], np.arange(clusters + 1)).astype(np.int64)
+
+        return cls(vectors, centroids.astype(np.float32), order, offsets, nprobe, max_k)
+
+    @staticmethod
+    def _assign(vectors, centroids, block_size):
+        assignment = np.empty(vectors.shape[0], dtype=np.intp)
+        for start in range(0, vectors.shape[0], block_size):
+            block = vectors[start:start + block_size]
+            assignment[start:start + block_size] = np.asarray(block @ centroids.T).argmax(axis=1)
+        return assignment
+
+    def updated(self, vectors, touched, block_size=4096):
+        """Index new vectors, assigning only the touched rows to buckets and keeping the centroids."""
+        vectors = normalize_rows(vectors)
+        buckets = len(self.offsets) - 1
+        assignment = np.empty(vectors.shape[0], dtype=np.intp)
+        assignment[self.order] = np.repeat(np.arange(buckets), np.diff(self.offsets))
+        assignment[touched] = self._assign(vectors[touched], self.centroids, block_size)
+
+        order = np.argsort(assignment, kind="stable").astype(np.int32)
+        offsets = np.searchsorted(assignment[order], np.arange(buckets + 1)).astype(np.int64)
+        return type(self)(vectors, self.centroids, order, offsets, self.nprobe, self.max_results)
+
+    def candidates(self, query, k):
+        """Return the sorted rows of the closest buckets, widening the probe until k are found."""
+        centroid_scores = np.asarray(query @ self.centroids.T).ravel()
+        buckets = len(self.offsets) - 1
+        probes = min(self.nprobe, buckets)
+
+        while True:
+            nearest = top_k_indices(centroid_scores, probes)
+            rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+            if len(rows) >= k or probes >= buckets:
+                return np.sort(rows)
+            probes = min(probes * 2, buckets)
+
+    def search(self, query, k, exclude=None):
+        """Return up to k rows ranked by cosine similarity to a normalized query row."""
+        rows = self.candidates(query, k + (exclude is not None))
+        scores = np.asarray((self.vectors[rows] @ query.T).todense()).ravel()
+
+        position = None
+        if exclude is not None:
+            position = int(np.searchsorted(rows, exclude))
+            if position >= len(rows) or rows[position] != exclude:
+                position = None
+
+        return rows[top_k_indices(scores, k, exclude=position)]
+
+    def top_k(self, row, k):
+        return self.search(self.vectors[row], min(k, self.max_k), exclude=row)
+
+    def top_k_many(self, rows, k):
+        k = min(k, self.max_k)
+        result = np.full((len(rows), k), -1, dtype=np.intp)
+        for i, row in enumerate(rows):
+            ranked = self.top_k(row, k)
+            result[i, :len(ranked)] = ranked
+        return result
+
+    def aggregate_scores(self, rows, weights, method):
+        """Combine seed similarities over the union of the seeds' buckets; other movies score -inf."""
+        seeds = self.vectors[rows]
+        if method == "sum":
+            # Cosine is linear in the normalized query, so one combined probe covers all seeds
+            query = sparse.csr_matrix(weights[None, :]) @ seeds
+            candidates = self.candidates(query, self.max_k)
+        else:
+            candidates = np.unique(np.concatenate([self.candidates(seeds[i], self.max_k) for i in range(len(rows))]))
+
+        block = np.asarray((self.vectors[candidates] @ seeds.T).todense()) * weights
+        combined = np.full(len(self), -np.inf)
+        combined[candidates] = block.sum(axis=1) if method == "sum" else block.max(axis=1)
+        return combined
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                data=self.vectors.data, indices=self.vectors.indices, indptr=self.vectors.indptr,
+                shape=np.array(self.vectors.shape), centroids=self.centroids,
+                order=self.order, offsets=self.offsets,
+                nprobe=np.array(self.nprobe), max_k=np.array(self.max_results),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            vectors = sparse.csr_matrix(
+                (data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"])
+            )
+            return cls(
+                vectors, data["centroids"], data["order"], data["offsets"],
+                int(data["nprobe"]), int(data["max_k"]),
+            )
+
+
+def tag_vectors(movies_path, max_features):
+    """Vectorize the tags column of the movie data the way the notebook does."""
+    movies_df = read_movies(movies_path or find_movies(), ["tags"])
+    vectors, _ = vectorize_tags(movies_df["tags"], max_features)
+    return vectors
+
+
+def benchmark(index, k, queries, seed=0):
+    """Compare the index against exact cosine search on a random sample of movies."""
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(index), min(queries, len(index)), replace=False)
+    recalls = []
+    exact_time = ann_time = 0.0
+
+    for row in sample:
+        started = time.perf_counter()
+        scores = np.asarray((index.vectors @ index.vectors[row].T).todense()).ravel()
+        exact = top_k_indices(scores, k, exclude=row)
+        exact_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        approximate = index.top_k(row, k)
+        ann_time += time.perf_counter() - started
+
+        if len(exact):
+            recalls.append(len(np.intersect1d(exact, approximate)) / len(exact))
+
+    return {
+        "recall": float(np.mean(recalls)) if recalls else 1.0,
+        "exact_ms": 1000 * exact_time / len(sample),
+        "ann_ms": 1000 * ann_time / len(sample),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="build the index from the tags of the movie data")
+    build.add_argument("--movies", help="movie data (default: movies.arrow or movies.pkl)")
+    build.add_argument("--output", default="ann_index.npz", help="index file to write")
+    build.add_argument("--max-features", type=int, default=5000, help="vocabulary size")
+    build.add_argument("--clusters", type=int, default=0, help="buckets (default: √N)")
+    build.add_argument("--nprobe", type=int, default=8, help="buckets scored per query")
+    build.add_argument("--iterations", type=int, default=10, help="k-means iterations")
+
+    bench = commands.add_parser("benchmark", help="measure recall@K against exact search")
+    bench.add_argument("--index", default="ann_index.npz", help="index file to evaluate")
+    bench.add_argument("--k", type=int, default=10, help="neighbors compared per query")
+    bench.add_argument("--queries", type=int, default=500, help="movies sampled as queries")
+    bench.add_argument("--nprobe", type=int, default=0, help="override the index's nprobe")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        vectors = tag_vectors(args.movies, args.max_features)
+        clusters = args.clusters or int(np.sqrt(vectors.shape[0]))
+        index = IVFIndex.build(vectors, clusters, args.iterations, args.nprobe)
+        index.save(args.output)
+        print(f"Wrote {len(index)} vectors in {clusters} buckets to {args.output}")
+    else:
+        index = IVFIndex.load(args.index)
+        if args.nprobe:
+            index.nprobe = args.nprobe
+        result = benchmark(index, args.k, args.queries)
+        print(
+            f"recall@{args.k}: {result['recall']:.3f}  "
+            f"exact: {result['exact_ms']:.2f} ms/query  ann: {result['ann_ms']:.2f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
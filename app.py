@@ -1,13 +1,12 @@
 import streamlit as st
-import pickle
-import pandas as pd
-import requests
+import numpy as np
 import os
-import json
-import time
 from dotenv import load_dotenv
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from catalog import ArtifactError, load_catalog
+from poster_cache import open_poster_cache
+from posters import client_from_env, fetch_posters
+from recommender import recommend_rows
 
 load_dotenv()
 
@@ -37,151 +36,51 @@ def get_api_key():
 
 API_KEY = get_api_key()
 
-# Use session state for cache instead of file writing
-if 'poster_cache' not in st.session_state:
-    CACHE_FILE = "poster_cache.json"
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r") as f:
-                st.session_state.poster_cache = json.load(f)
-        except Exception:
-            st.session_state.poster_cache = {}
-    else:
-        st.session_state.poster_cache = {}
-
-def create_session():
-    """Create a requests session with retry logic and connection pooling."""
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"]
-    )
-    
-    adapter = HTTPAdapter(
-        max_retries=retry_strategy,
-        pool_connections=10,
-        pool_maxsize=20
-    )
-    
-    session = requests.Session()
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    })
-    
-    return session
-
-API_SESSION = create_session()
-
-@st.cache_data(ttl=3600)  
-def fetch_poster(movie_id):
-    """Fetch poster URL from TMDB API with caching."""
-    movie_id = str(movie_id)
-    
-    # Check session state cache
-    if movie_id in st.session_state.poster_cache:
-        return st.session_state.poster_cache[movie_id]
-
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={API_KEY}&language=en-US"
-    
-    try:
-        response = API_SESSION.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-
-        if "poster_path" not in data or not data["poster_path"]:
-            return None
-
-        poster_url = "https://image.tmdb.org/t/p/w500" + data["poster_path"]
-        
-        # Store in session state instead of file
-        st.session_state.poster_cache[movie_id] = poster_url
+@st.cache_resource
+def get_poster_client():
+    """One pooled, rate-limited TMDB client shared by every session in the process."""
+    return client_from_env(API_KEY)
 
-        return poster_url
+@st.cache_resource
+def get_poster_cache():
+    """Persistent poster cache shared by every session, process and restart."""
+    return open_poster_cache()
 
-    except Exception:
-        return None
-
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def load_data():
     """Load movie data and similarity matrix safely."""
-    
-    def safe_pickle_load(file_path, description):
-        """Helper to safely unpickle files with multiple fallbacks."""
-        if not os.path.exists(file_path):
-            st.error(f"❌ File not found: {file_path}")
-            st.stop()
-            
-        try:
-            with open(file_path, "rb") as f:
-                return pickle.load(f)
-        except Exception:
-            try:
-                with open(file_path, "rb") as f:
-                    return pickle.load(f, encoding="latin1")
-            except Exception as e:
-                st.error(f"❌ Failed to load {description}: {str(e)}")
-                st.stop()
-
-    movies_df = safe_pickle_load("movies.pkl", "movie data")
-    similarity = safe_pickle_load("similarity.pkl", "similarity matrix")
-
-    if movies_df is not None:
-        try:
-            movies_df = movies_df.reset_index(drop=True)
-        except Exception as e:
-            st.error(f"❌ Error processing movie data: {str(e)}")
-            st.stop()
-
-    return movies_df, similarity
+    try:
+        return load_catalog()
+    except ArtifactError as e:
+        st.error(f"❌ {str(e)}")
+        st.stop()
 
 # Load data at startup
 try:
-    movies_df, similarity = load_data()
+    movies_df, similarity, movie_lookup = load_data()
 except Exception as e:
     st.error(f"❌ Failed to initialize app: {str(e)}")
     st.stop()
 
-def get_recommended_movie_indices(movie):
-    """Return sorted list of movie indices by similarity."""
+def get_recommended_movie_indices(movie, k=5):
+    """Return the indices of the k movies most similar to the given title."""
     try:
-        movie_index = movies_df[movies_df["title"] == movie].index[0]
-    except IndexError:
+        return recommend_rows(similarity, movie_lookup, movie, k)
+    except KeyError:
         st.error("Selected movie not found in database.")
-        return []
-
-    if movie_index >= len(similarity):
+    except ValueError:
         st.error("Data mismatch: similarity matrix and movie list are out of sync.")
-        return []
 
-    distances = similarity[movie_index]
-    movie_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:]
-    
-    return [i[0] for i in movie_list]
+    return np.empty(0, dtype=np.intp)
 
 def fetch_recommendations_batch(movie_indices, start_idx, batch_size=5):
     """Fetch a batch of recommendations with posters."""
-    end_idx = min(start_idx + batch_size, len(movie_indices))
+    movie_ids, titles = movie_lookup.gather(movie_indices[start_idx:start_idx + batch_size])
     
-    recommended_movies = []
-    recommended_posters = []
-    
-    for i in range(start_idx, end_idx):
-        idx = movie_indices[i]
-        movie_id = movies_df.iloc[idx].movie_id
-        title = movies_df.iloc[idx].title
-        
-        poster_url = fetch_poster(movie_id)
-        
-        recommended_movies.append(title)
-        recommended_posters.append(poster_url)
-        
-        if (i - start_idx + 1) % 5 == 0 and i < end_idx - 1:
-            time.sleep(0.2)
+    # Look up every uncached poster of the page in parallel
+    recommended_posters = fetch_posters(get_poster_client(), get_poster_cache(), movie_ids.tolist())
     
-    return recommended_movies, recommended_posters
+    return titles.tolist(), recommended_posters
 
 # Initialize session state
 if 'movies_to_show' not in st.session_state:
@@ -191,7 +90,7 @@ if 'current_movie' not in st.session_state:
     st.session_state.current_movie = None
 
 if 'movie_indices' not in st.session_state:
-    st.session_state.movie_indices = []
+    st.session_state.movie_indices = np.empty(0, dtype=np.intp)
 
 if 'cached_names' not in st.session_state:
     st.session_state.cached_names = []
@@ -218,10 +117,10 @@ st.set_page_config(
 
 st.title("🎬 Movie Recommender System")
 
-# Movie selection dropdown
+# Movie selection dropdown; a repeated title is listed once, since it resolves to its first row
 selected_movie = st.selectbox(
     "Select a movie:",
-    movies_df["title"].values,
+    list(movie_lookup.row_by_title),
     index=None,
     placeholder="Search or select a movie...",
 )
@@ -230,12 +129,23 @@ selected_movie = st.selectbox(
 if selected_movie and selected_movie != st.session_state.current_movie:
     st.session_state.current_movie = selected_movie
     reset_movie_count()
-    st.session_state.movie_indices = get_recommended_movie_indices(selected_movie)
+    st.session_state.movie_indices = get_recommended_movie_indices(
+        selected_movie, st.session_state.movies_to_show
+    )
 
 if selected_movie:
     movie_indices = st.session_state.movie_indices
+    total_recommendations = similarity.max_k
+    
+    # Extend the top-K lazily as the "More" button is pressed
+    if 0 < len(movie_indices) < min(st.session_state.movies_to_show, total_recommendations):
+        movie_indices = get_recommended_movie_indices(
+            selected_movie,
+            max(st.session_state.movies_to_show, 2 * len(movie_indices))
+        )
+        st.session_state.movie_indices = movie_indices
     
-    if movie_indices:
+    if len(movie_indices):
         st.subheader("🎥 Recommended Movies:")
         
         num_to_display = min(st.session_state.movies_to_show, len(movie_indices))
@@ -280,7 +190,7 @@ if selected_movie:
                         st.caption(st.session_state.cached_names[movie_idx])
         
         # Show "More" button if there are more movies to display
-        if num_to_display < len(movie_indices):
+        if num_to_display < total_recommendations:
             col1, col2, col3 = st.columns([2, 1, 2])
             with col2:
                 st.button(
@@ -290,7 +200,7 @@ if selected_movie:
                     type="primary"
                 )
         else:
-            st.success(f"✓ All {len(movie_indices)} recommendations displayed")
+            st.success(f"✓ All {total_recommendations} recommendations displayed")
     else:
         st.info("No recommendations found.")
 else:
@@ -0,0 +1,119 @@
+"""Typed binary array artifacts that are validated before their payload is read.
+
+Layout: the 8-byte magic, a little-endian uint16 format version, a uint16
+reserved field and a uint32 header length, then a JSON header
+
+    {"dtype": "<f4", "shape": [4803, 4803], "payload_bytes": ..., "crc32": ...}
+
+padded so the C-order payload that follows starts on a 64-byte boundary and
+can be memory-mapped in place. Magic, version, dtype, shape and file size are
+all checked before any payload byte is touched; the CRC32 is verified in the
+same single pass that reads (or maps) the payload.
+"""
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"MOVIEREC"
+VERSION = 1
+ALIGNMENT = 64
+
+_prefix = struct.Struct("<8sHHI")
+
+
+class ArtifactError(Exception):
+    """A data artifact is missing or cannot be read."""
+
+
+def save_array(path, array):
+    """Write array with its header, atomically replacing path."""
+    array = np.asarray(array, order="C")
+    if array.dtype.hasobject:
+        raise ValueError("Object arrays cannot be stored as typed artifacts")
+
+    header = {
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "payload_bytes": array.nbytes,
+        "crc32": zlib.crc32(array.reshape(-1).view(np.uint8)),
+    }
+    encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+    padding = -(_prefix.size + len(encoded)) % ALIGNMENT
+    encoded += b" " * padding
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_prefix.pack(MAGIC, VERSION, 0, len(encoded)))
+        f.write(encoded)
+        f.write(array.reshape(-1).view(np.uint8))
+    os.replace(tmp_path, path)
+
+
+def read_header(f, path):
+    """Parse and check the header of an open artifact; return (header, payload offset)."""
+    prefix = f.read(_prefix.size)
+    if len(prefix) < _prefix.size:
+        raise ArtifactError(f"{path} is too short to be an artifact")
+    magic, version, _, header_length = _prefix.unpack(prefix)
+    if magic != MAGIC:
+        raise ArtifactError(f"{path} is not a typed artifact (bad magic {magic!r})")
+    if version != VERSION:
+        raise ArtifactError(f"{path} has unsupported artifact version {version}")
+
+    try:
+        header = json.loads(f.read(header_length))
+        dtype = np.dtype(header["dtype"])
+        shape = tuple(int(size) for size in header["shape"])
+        payload_bytes = int(header["payload_bytes"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ArtifactError(f"{path} has a corrupt header: {str(e)}") from e
+
+    if dtype.hasobject:
+        raise ArtifactError(f"{path} declares an object dtype")
+    if any(size < 0 for size in shape):
+        raise ArtifactError(f"{path} declares a negative dimension in {shape}")
+    if payload_bytes != int(np.prod(shape, dtype=np.int64)) * dtype.itemsize:
+        raise ArtifactError(f"{path} declares {payload_bytes} payload bytes for {dtype} {shape}")
+
+    offset = _prefix.size + header_length
+    size = os.fstat(f.fileno()).st_size
+    if size != offset + payload_bytes:
+        raise ArtifactError(f"{path} is {size} bytes, expected {offset + payload_bytes}")
+
+    return {"dtype": dtype, "shape": shape, "crc32": header.get("crc32")}, offset
+
+
+def load_array(path, dtype=None, ndim=None, mmap=True, verify=True):
+    """Read a typed artifact in one pass, memory-mapped read-only or into a preallocated array.
+
+    Expected dtype and ndim are checked against the header before the
+    payload is read; verify recomputes the CRC32 while reading.
+    """
+    if not os.path.exists(path):
+        raise ArtifactError(f"File not found: {path}")
+
+    with open(path, "rb") as f:
+        header, offset = read_header(f, path)
+        if dtype is not None and header["dtype"] != np.dtype(dtype):
+            raise ArtifactError(f"{path} holds {header['dtype']}, expected {np.dtype(dtype)}")
+        if ndim is not None and len(header["shape"]) != ndim:
+            raise ArtifactError(f"{path} holds a {len(header['shape'])}-D array, expected {ndim}-D")
+
+        if mmap and header["shape"] and all(header["shape"]):
+            array = np.memmap(path, dtype=header["dtype"], mode="r", offset=offset, shape=header["shape"])
+        else:
+            array = np.empty(header["shape"], dtype=header["dtype"])
+            view = memoryview(array.reshape(-1).view(np.uint8))
+            filled = 0
+            while filled < len(view):
+                read = f.readinto(view[filled:])
+                if not read:
+                    raise ArtifactError(f"{path} ended after {filled} payload bytes")
+                filled += read
+
+    if verify and zlib.crc32(array.reshape(-1).view(np.uint8)) != header["crc32"]:
+        raise ArtifactError(f"{path} failed its checksum")
+    return array
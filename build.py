@@ -0,0 +1,248 @@
+"""Build the catalog artifacts from the TMDB CSVs in one reproducible pass.
+
+    python build.py --movies-csv dataset/tmdb_5000_movies.csv --credits-csv dataset/tmdb_5000_credits.csv
+
+Runs parse → tags → stem → vectorize → top-K neighbors and writes movies.arrow,
+tag_vectors.npz, similarity_topk.npz (plus recommendations.npy with --lists)
+and manifest.json. The manifest records the input hashes, the parameters and
+the checksum of every output; a run whose inputs and parameters match an
+intact previous build is skipped. Unlike the notebook, tags are stemmed
+before they are vectorized.
+
+Every stage's output is also kept in --cache-dir (Parquet for the movie
+frames, .npz for vectors and neighbors) under a hash of the inputs and
+parameters it depends on, so changing e.g. --k reruns only the last stage.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import write_movies
+from features import load_tag_vectors, save_tag_vectors, vectorize_tags
+from preprocess import load_tmdb, make_tags, stem_tags
+from recommender import NeighborStore, RecommendationLists
+from similarity_build import build_neighbor_store
+
+# Bump whenever a change to the pipeline changes its outputs
+BUILD_VERSION = 3
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Intermediate build outputs on disk, keyed by a hash of everything they depend on.
+
+    A stage's key covers its name, BUILD_VERSION, the key of the stage it
+    reads and its own parameters, so a changed input or setting invalidates
+    that stage and every later one. With no directory nothing is cached.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(stage, **depends):
+        description = json.dumps({"stage": stage, "build_version": BUILD_VERSION, **depends}, sort_keys=True)
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+    def run(self, stage, key, suffix, compute, save, load):
+        """Return (result, hit), loading the stored result for key or computing and storing it."""
+        if not self.directory:
+            return compute(), False
+
+        path = os.path.join(self.directory, f"{stage}-{key[:16]}{suffix}")
+        if os.path.exists(path):
+            return load(path), True
+
+        result = compute()
+        tmp_path = f"{path}.tmp"
+        save(result, tmp_path)
+        os.replace(tmp_path, path)
+        return result, False
+
+
+def save_frame(frame, path):
+    frame.to_parquet(path, index=False)
+
+
+def vectorize(tags, max_features):
+    vectors, vectorizer = vectorize_tags(tags, max_features)
+    return vectors, vectorizer.vocabulary_
+
+
+def save_vectors(vectorized, path):
+    vectors, vocabulary = vectorized
+    save_tag_vectors(path, vectors, vocabulary)
+
+
+def describe_outputs(directory, names):
+    return {
+        name: {
+            "sha256": file_sha256(os.path.join(directory, name)),
+            "bytes": os.path.getsize(os.path.join(directory, name)),
+        }
+        for name in names
+    }
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def is_current(manifest, directory, inputs, parameters):
+    """True when manifest describes a build of these inputs and parameters whose outputs are untouched."""
+    if manifest is None or manifest["build_version"] != BUILD_VERSION:
+        return False
+    if manifest["inputs"] != inputs or manifest["parameters"] != parameters:
+        return False
+    if not parameters["lists"] and os.path.exists(os.path.join(directory, "recommendations.npy")):
+        return False
+    try:
+        return describe_outputs(directory, manifest["outputs"]) == manifest["outputs"]
+    except OSError:
+        return False
+
+
+def build(movies_csv, credits_csv, directory=".", max_features=5000, k=100, lists=0,
+          scores_dtype="float16", workers=1, block_size=256, force=False, cache_dir=None):
+    """Run the pipeline unless the manifest in directory is current; return (manifest, built)."""
+
+    def path(name):
+        return os.path.join(directory, name)
+
+    if lists > k:
+        raise ValueError(f"--lists ({lists}) cannot exceed --k ({k}); the lists are cut from the neighbor store")
+
+    inputs = {"movies_csv": file_sha256(movies_csv), "credits_csv": file_sha256(credits_csv)}
+    # Only settings that change the outputs; workers and block size do not
+    parameters = {"max_features": max_features, "k": k, "lists": lists, "scores_dtype": scores_dtype}
+
+    manifest = load_manifest(path("manifest.json"))
+    if not force and is_current(manifest, directory, inputs, parameters):
+        return manifest, False
+
+    os.makedirs(directory, exist_ok=True)
+    cache = StageCache(cache_dir)
+    stages = {}
+
+    def stage(name, suffix, compute, save, load, upstream=None, **depends):
+        key = cache.key(name, upstream=upstream, **depends)
+        started = time.perf_counter()
+        result, hit = cache.run(name, key, suffix, compute, save, load)
+        stages[name] = {"key": key, "cached": hit, "seconds": round(time.perf_counter() - started, 3)}
+        return result, key
+
+    movies, key = stage(
+        "parse", ".parquet", lambda: load_tmdb(movies_csv, credits_csv, workers),
+        save_frame, pd.read_parquet, **inputs
+    )
+    movies, key = stage("tags", ".parquet", lambda: make_tags(movies), save_frame, pd.read_parquet, key)
+    movies, key = stage(
+        "stem", ".parquet", lambda: movies.assign(tags=stem_tags(movies["tags"], workers)),
+        save_frame, pd.read_parquet, key
+    )
+    (vectors, vocabulary), key = stage(
+        "vectorize", ".npz",
+        lambda: vectorize(movies["tags"], max_features),
+        save_vectors, load_tag_vectors, key, max_features=max_features
+    )
+    store, key = stage(
+        "neighbors", ".npz",
+        lambda: build_neighbor_store(
+            vectors, k, path("similarity_topk.npz"), block_size, None, np.dtype(scores_dtype), workers
+        ),
+        lambda store, p: store.save(p), NeighborStore.load, key, k=k, scores_dtype=scores_dtype
+    )
+    if stages["neighbors"]["cached"]:
+        store.save(path("similarity_topk.npz"))
+
+    outputs = ["movies.arrow", "tag_vectors.npz", "similarity_topk.npz"]
+    removed = []
+    write_movies(movies, path("movies.arrow"))
+    save_tag_vectors(path("tag_vectors.npz"), vectors, vocabulary)
+    if lists:
+        top = NeighborStore(store.indices[:, :lists], store.scores[:, :lists])
+        RecommendationLists.from_neighbors(top).save(path("recommendations.npy"))
+        outputs.append("recommendations.npy")
+    elif os.path.exists(path("recommendations.npy")):
+        # Lists from an earlier build or convert_similarity.py would take precedence over the new store
+        os.remove(path("recommendations.npy"))
+        removed.append("recommendations.npy")
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "build_version": BUILD_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "inputs": inputs,
+        "parameters": parameters,
+        "movies": len(movies),
+        "vocabulary": len(vocabulary),
+        "stages": stages,
+        "outputs": describe_outputs(directory, outputs),
+        "removed": removed,
+    }
+    # Written last, so an interrupted build is never mistaken for a finished one
+    with open(path("manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest, True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies-csv", default="dataset/tmdb_5000_movies.csv", help="TMDB movies CSV")
+    parser.add_argument("--credits-csv", default="dataset/tmdb_5000_credits.csv", help="TMDB credits CSV")
+    parser.add_argument("--output-dir", default=".", help="directory to write the artifacts to")
+    parser.add_argument("--max-features", type=int, default=5000, help="vocabulary size")
+    parser.add_argument("--k", type=int, default=100, help="neighbors kept per movie")
+    parser.add_argument("--lists", type=int, default=0, help="also write recommendations.npy with this many per movie")
+    parser.add_argument(
+        "--scores-dtype", choices=["float16", "float32"], default="float16",
+        help="precision of the stored similarity scores"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="build processes")
+    parser.add_argument("--block-size", type=int, default=256, help="rows scored at once")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the manifest is current")
+    parser.add_argument("--cache-dir", default=".build_cache", help="stage output cache ('' to disable)")
+    args = parser.parse_args()
+
+    if args.lists > args.k:
+        parser.error(f"--lists ({args.lists}) cannot exceed --k ({args.k})")
+
+    manifest, built = build(
+        args.movies_csv, args.credits_csv, args.output_dir, args.max_features, args.k, args.lists,
+        args.scores_dtype, args.workers, args.block_size, args.force, args.cache_dir or None
+    )
+    if not built:
+        print(f"Artifacts in {args.output_dir} are up to date (built {manifest['built_at']})")
+        return
+
+    stages = ", ".join(
+        f"{name} cached" if stage["cached"] else f"{name} {stage['seconds']:.1f}s"
+        for name, stage in manifest["stages"].items()
+    )
+    print(f"Built {manifest['movies']} movies into {args.output_dir}: {stages}")
+    for name in manifest["removed"]:
+        print(f"Removed {name}: it would have been served instead of the new neighbor store")
+
+
+if __name__ == "__main__":
+    main()
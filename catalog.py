@@ -0,0 +1,114 @@
+import os
+import pickle
+
+from pyarrow import feather
+
+from artifact import ArtifactError, load_array
+from recommender import (
+    CachedRecommendations, DenseSimilarity, MovieLookup, NeighborStore, RecommendationLists
+)
+
+
+# The only movie columns needed to serve recommendations
+SERVING_COLUMNS = ["movie_id", "title"]
+
+
+def safe_pickle_load(file_path, description):
+    """Unpickle a legacy file, retrying with latin1 for pickles written by Python 2."""
+    if not os.path.exists(file_path):
+        raise ArtifactError(f"File not found: {file_path}")
+
+    try:
+        with open(file_path, "rb") as f:
+            try:
+                return pickle.load(f)
+            except UnicodeDecodeError:
+                # Python 2 str pickles; anything else (truncated, corrupt) fails after one pass
+                f.seek(0)
+                return pickle.load(f, encoding="latin1")
+    except Exception as e:
+        raise ArtifactError(f"Failed to load {description}: {str(e)}") from e
+
+
+def find_movies(directory="."):
+    """Path of the movie metadata in directory: movies.arrow if present, else the legacy movies.pkl."""
+    arrow_path = os.path.join(directory, "movies.arrow")
+    return arrow_path if os.path.exists(arrow_path) else os.path.join(directory, "movies.pkl")
+
+
+def read_movies(path, columns=None):
+    """Read movie metadata from an Arrow IPC (.arrow/.feather) file or a pickled DataFrame.
+
+    Arrow files are memory-mapped and only the requested columns are read;
+    pickles are always loaded whole.
+    """
+    if not path.endswith((".arrow", ".feather")):
+        movies_df = safe_pickle_load(path, "movie data")
+        missing = set(columns or []) - set(movies_df.columns)
+        if missing:
+            raise ArtifactError(f"Movie data lacks the columns: {', '.join(sorted(missing))}")
+        return movies_df[columns] if columns else movies_df
+
+    if not os.path.exists(path):
+        raise ArtifactError(f"File not found: {path}")
+    try:
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    except Exception as e:
+        raise ArtifactError(f"Failed to load movie data: {str(e)}") from e
+
+
+def write_movies(movies_df, path):
+    """Write movie metadata as uncompressed Arrow IPC, so readers can memory-map it."""
+    feather.write_feather(movies_df.reset_index(drop=True), path, compression="uncompressed")
+
+
+def load_similarity(directory="."):
+    """Open the cheapest similarity backend available in directory."""
+
+    def path(name):
+        return os.path.join(directory, name)
+
+    def attempt(loader, name, description):
+        try:
+            return loader(path(name))
+        except Exception as e:
+            raise ArtifactError(f"Failed to load {description}: {str(e)}") from e
+
+    # Prefer precomputed lists, then the compact top-K neighbor store
+    if os.path.exists(path("recommendations.npy")):
+        return attempt(RecommendationLists.load, "recommendations.npy", "recommendation lists")
+    if os.path.exists(path("similarity_topk.npz")):
+        return attempt(NeighborStore.load, "similarity_topk.npz", "neighbor store")
+    if os.path.exists(path("ann_index.npz")):
+        # Imported here so deployments without an index skip loading SciPy and scikit-learn
+        from ann import IVFIndex
+
+        return CachedRecommendations(attempt(IVFIndex.load, "ann_index.npz", "ANN index"))
+    if os.path.exists(path("similarity.bin")):
+        # Header, dtype, shape and size are checked up front; the checksum is verified at
+        # convert time (convert_similarity.py check), so pages are still read on demand
+        return CachedRecommendations(DenseSimilarity(attempt(
+            lambda p: load_array(p, ndim=2, verify=False), "similarity.bin", "similarity matrix"
+        )))
+    if os.path.exists(path("similarity.npy")):
+        # Memory-mapped: pages are shared across processes via the page cache
+        return CachedRecommendations(attempt(DenseSimilarity.load, "similarity.npy", "similarity matrix"))
+
+    # Rankings computed from the dense matrix are shared by every caller
+    return CachedRecommendations(
+        DenseSimilarity(safe_pickle_load(path("similarity.pkl"), "similarity matrix"))
+    )
+
+
+def load_catalog(directory="."):
+    """Load movie ids and titles, the similarity backend and the lookup index built over them."""
+    movies_df = read_movies(find_movies(directory), SERVING_COLUMNS)
+    similarity = load_similarity(directory)
+
+    try:
+        movies_df = movies_df.reset_index(drop=True)
+        movie_lookup = MovieLookup.from_dataframe(movies_df)
+    except Exception as e:
+        raise ArtifactError(f"Error processing movie data: {str(e)}") from e
+
+    return movies_df, similarity, movie_lookup
@@ -0,0 +1,109 @@
+"""Convert the dense similarity.pkl and movies.pkl into formats that are cheaper to serve.
+
+    python convert_similarity.py lists --m 500  # recommendations.npy (ranked lists only)
+    python convert_similarity.py topk --k 100   # similarity_topk.npz
+    python convert_similarity.py npy            # similarity.npy (memory-mapped)
+    python convert_similarity.py bin            # similarity.bin (checksummed, memory-mapped)
+    python convert_similarity.py check          # verify the checksum of similarity.bin
+    python convert_similarity.py movies         # movies.arrow (columnar movie metadata)
+"""
+import argparse
+import pickle
+
+import numpy as np
+
+from artifact import ArtifactError, load_array, save_array
+from catalog import read_movies, write_movies
+from recommender import DenseSimilarity, NeighborStore, RecommendationLists
+
+
+def build_lists(similarity, args):
+    lists = RecommendationLists.from_dense(similarity, args.m)
+    lists.save(args.output)
+    print(f"Wrote {len(lists)}×{lists.max_k} {lists.lists.dtype} recommendation lists to {args.output}")
+
+
+def build_topk(similarity, args):
+    store = NeighborStore.from_dense(similarity, args.k, scores_dtype=np.dtype(args.scores_dtype))
+    store.save(args.output)
+    print(f"Wrote {len(store)}×{store.max_k} neighbors to {args.output}")
+
+
+def build_npy(similarity, args):
+    DenseSimilarity(similarity).save(args.output, dtype=np.dtype(args.dtype))
+    print(f"Wrote {len(similarity)}×{len(similarity)} {args.dtype} matrix to {args.output}")
+
+
+def build_bin(similarity, args):
+    save_array(args.output, np.asarray(similarity, dtype=np.dtype(args.dtype)))
+    # The server only checks the header, so the checksum is verified once here
+    load_array(args.output, verify=True)
+    print(f"Wrote {len(similarity)}×{len(similarity)} {args.dtype} typed artifact to {args.output}")
+
+
+def check_artifact(args):
+    try:
+        array = load_array(args.path, verify=True)
+    except ArtifactError as e:
+        raise SystemExit(f"❌ {str(e)}")
+    print(f"{args.path}: {array.dtype} {array.shape}, checksum OK")
+
+
+def convert_movies(args):
+    movies_df = read_movies(args.movies)
+    write_movies(movies_df, args.output)
+    print(f"Wrote {len(movies_df)} movies with columns {', '.join(movies_df.columns)} to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--similarity", default="similarity.pkl", help="dense similarity matrix pickle")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    lists = commands.add_parser("lists", help="precompute the ranked top-M list of every movie")
+    lists.add_argument("--output", default="recommendations.npy", help="recommendation lists to write")
+    lists.add_argument("--m", type=int, default=500, help="recommendations kept per movie")
+    lists.set_defaults(handler=build_lists)
+
+    topk = commands.add_parser("topk", help="keep only the best K neighbors per movie")
+    topk.add_argument("--output", default="similarity_topk.npz", help="neighbor store to write")
+    topk.add_argument("--k", type=int, default=100, help="neighbors kept per movie")
+    topk.add_argument(
+        "--scores-dtype", choices=["float16", "float32"], default="float16",
+        help="precision of the stored similarity scores"
+    )
+    topk.set_defaults(handler=build_topk)
+
+    npy = commands.add_parser("npy", help="write the full matrix as a memory-mappable .npy file")
+    npy.add_argument("--output", default="similarity.npy", help="matrix file to write")
+    npy.add_argument("--dtype", choices=["float16", "float32"], default="float32", help="stored precision")
+    npy.set_defaults(handler=build_npy)
+
+    binary = commands.add_parser("bin", help="write the full matrix as a checksummed typed artifact")
+    binary.add_argument("--output", default="similarity.bin", help="artifact file to write")
+    binary.add_argument("--dtype", choices=["float16", "float32"], default="float32", help="stored precision")
+    binary.set_defaults(handler=build_bin)
+
+    movies = commands.add_parser("movies", help="write the movie metadata as memory-mappable Arrow IPC")
+    movies.add_argument("--movies", default="movies.pkl", help="movie data pickle")
+    movies.add_argument("--output", default="movies.arrow", help="Arrow file to write")
+
+    check = commands.add_parser("check", help="verify the header and checksum of a typed artifact")
+    check.add_argument("path", nargs="?", default="similarity.bin", help="artifact file to verify")
+
+    args = parser.parse_args()
+    if args.command == "movies":
+        convert_movies(args)
+        return
+    if args.command == "check":
+        check_artifact(args)
+        return
+
+    with open(args.similarity, "rb") as f:
+        similarity = pickle.load(f)
+
+    args.handler(similarity, args)
+
+
+if __name__ == "__main__":
+    main()
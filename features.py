@@ -0,0 +1,73 @@
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+def vectorize_tags(tags, max_features=5000, vocabulary=None):
+    """Bag-of-words counts of the tag strings as a CSR matrix, never densified.
+
+    Mirrors the notebook's CountVectorizer(max_features=5000,
+    stop_words='english'). Pass a fitted vocabulary to reuse it. Returns the
+    vectors and the fitted vectorizer.
+    """
+    vectorizer = CountVectorizer(
+        max_features=None if vocabulary is not None else max_features,
+        stop_words="english",
+        vocabulary=vocabulary,
+        dtype=np.float32,
+    )
+    vectors = sparse.csr_matrix(vectorizer.fit_transform(tags))
+    # Canonical column order, so a row sums identically whichever vocabulary path produced it
+    vectors.sort_indices()
+    return vectors, vectorizer
+
+
+def save_tag_vectors(path, vectors, vocabulary):
+    """Store tag vectors with the vocabulary that produced them, so later movies can reuse it."""
+    terms = sorted(vocabulary, key=vocabulary.get)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            data=vectors.data, indices=vectors.indices, indptr=vectors.indptr,
+            shape=np.array(vectors.shape), terms=np.array(terms, dtype=str),
+        )
+
+
+def load_tag_vectors(path):
+    """Return the (CSR vectors, {term: column} vocabulary) written by save_tag_vectors."""
+    with np.load(path) as data:
+        vectors = sparse.csr_matrix(
+            (data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"])
+        )
+        vocabulary = {str(term): column for column, term in enumerate(data["terms"])}
+    return vectors, vocabulary
+
+
+def normalize_rows(vectors):
+    """Scale every row to unit L2 norm; rows without any tag stay zero."""
+    vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.csr_matrix(sparse.diags(scale.astype(np.float32)) @ vectors)
+
+
+def similarity_blocks(vectors, block_size=1024):
+    """Yield (start, block) pairs where block is the dense cosine similarity of rows start:start+len(block).
+
+    Each block is one sparse product against the transposed matrix, so peak
+    memory is block_size × N rather than N × N.
+    """
+    normalized = normalize_rows(vectors)
+    transposed = sparse.csc_matrix(normalized.T)
+    for start in range(0, normalized.shape[0], block_size):
+        block = normalized[start:start + block_size] @ transposed
+        yield start, block.toarray()
+
+
+def cosine_similarity_matrix(vectors, block_size=1024):
+    """Full N×N float32 cosine similarity, the sparse equivalent of sklearn's cosine_similarity."""
+    n = vectors.shape[0]
+    similarity = np.empty((n, n), dtype=np.float32)
+    for start, block in similarity_blocks(vectors, block_size):
+        similarity[start:start + len(block)] = block
+    return similarity
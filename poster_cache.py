@@ -0,0 +1,191 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+
+class PosterCache:
+    """Persistent poster URL cache shared by every process that opens the same SQLite file.
+
+    Entries are keyed by TMDB movie id. A NULL poster_url records a movie
+    that has no poster, so it is not looked up again until `negative_ttl`
+    passes. Writes and LRU access times are buffered and written back in
+    batches; once more than `max_entries` rows exist, the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, path, ttl=30 * DAY, negative_ttl=DAY, max_entries=50_000,
+                 batch_size=50, flush_interval=5.0):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.lock = threading.Lock()
+        self.preloaded = {}
+        self.pending = {}
+        self.touched = {}
+        self.last_flush = time.monotonic()
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS posters (
+                movie_id TEXT PRIMARY KEY,
+                poster_url TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS posters_accessed ON posters (accessed_at)")
+        self.conn.commit()
+
+        atexit.register(self.flush)
+
+    def _is_fresh(self, poster_url, fetched_at, now):
+        return now - fetched_at < (self.ttl if poster_url else self.negative_ttl)
+
+    def get_many(self, movie_ids):
+        """Return {movie_id: poster_url or None} for every fresh entry; misses are left out."""
+        movie_ids = list(dict.fromkeys(str(movie_id) for movie_id in movie_ids))
+        now = time.time()
+        found = {}
+
+        with self.lock:
+            for movie_id in movie_ids:
+                if movie_id in self.preloaded:
+                    found[movie_id] = self.preloaded[movie_id]
+                elif movie_id in self.pending:
+                    found[movie_id] = self.pending[movie_id][0]
+
+            lookup = [movie_id for movie_id in movie_ids if movie_id not in found]
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(lookup), 500):
+                chunk = lookup[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT movie_id, poster_url, fetched_at FROM posters "
+                    f"WHERE movie_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for movie_id, poster_url, fetched_at in rows:
+                    if self._is_fresh(poster_url, fetched_at, now):
+                        found[movie_id] = poster_url
+
+            for movie_id in found:
+                if movie_id not in self.preloaded:
+                    self.touched[movie_id] = now
+
+        self._maybe_flush()
+        return found
+
+    def preload(self, posters):
+        """Serve {movie_id: poster_url or None} from memory, e.g. a prewarmed poster artifact."""
+        with self.lock:
+            self.preloaded.update((str(movie_id), url) for movie_id, url in posters.items())
+
+    def put_many(self, posters):
+        """Record {movie_id: poster_url or None}; None marks a movie without a poster."""
+        now = time.time()
+        with self.lock:
+            for movie_id, poster_url in posters.items():
+                self.pending[str(movie_id)] = (poster_url, now)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        due = time.monotonic() - self.last_flush >= self.flush_interval
+        if len(self.pending) >= self.batch_size or (due and (self.pending or self.touched)):
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries and access times back, then evict stale and excess rows."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            touched, self.touched = self.touched, {}
+            self.last_flush = time.monotonic()
+            if not pending and not touched:
+                return
+
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO posters (movie_id, poster_url, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(movie_id, url, fetched_at, fetched_at) for movie_id, (url, fetched_at) in pending.items()]
+                )
+                self.conn.executemany(
+                    "UPDATE posters SET accessed_at = MAX(accessed_at, ?) WHERE movie_id = ?",
+                    [(accessed_at, movie_id) for movie_id, accessed_at in touched.items()]
+                )
+                self.conn.execute(
+                    "DELETE FROM posters WHERE fetched_at < CASE WHEN poster_url IS NULL "
+                    "THEN ? ELSE ? END",
+                    (now - self.negative_ttl, now - self.ttl)
+                )
+                self.conn.execute(
+                    "DELETE FROM posters WHERE movie_id IN (SELECT movie_id FROM posters "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def import_json(self, path):
+        """Seed the cache from the legacy poster_cache.json without overwriting newer entries."""
+        with open(path, "r") as f:
+            posters = json.load(f)
+
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO posters (movie_id, poster_url, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(str(movie_id), url, now, now) for movie_id, url in posters.items()]
+            )
+
+
+def load_poster_artifact(path):
+    """Read a prewarmed poster artifact as {movie_id: {"poster_url": ..., "fetched_at": ...}}."""
+    with open(path, "r") as f:
+        artifact = json.load(f)
+
+    if artifact.get("version") != 1:
+        raise ValueError(f"Unsupported poster artifact version: {artifact.get('version')!r}")
+
+    return artifact["posters"]
+
+
+def save_poster_artifact(path, posters):
+    """Atomically write a poster artifact so an interrupted run never leaves a torn file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": 1, "posters": posters}, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def open_poster_cache(directory="."):
+    """Open the cache at POSTER_CACHE_DB, seeded from posters.json and the legacy poster_cache.json."""
+    cache = PosterCache(os.getenv("POSTER_CACHE_DB", os.path.join(directory, "poster_cache.sqlite3")))
+
+    # Posters prewarmed offline by prewarm_posters.py need no network calls
+    artifact_path = os.path.join(directory, "posters.json")
+    if os.path.exists(artifact_path):
+        try:
+            posters = load_poster_artifact(artifact_path)
+            cache.preload({movie_id: entry["poster_url"] for movie_id, entry in posters.items()})
+        except Exception:
+            pass
+
+    # Carry over posters collected in the legacy JSON cache
+    legacy_path = os.path.join(directory, "poster_cache.json")
+    if os.path.exists(legacy_path):
+        try:
+            cache.import_json(legacy_path)
+        except Exception:
+            pass
+
+    return cache
@@ -0,0 +1,245 @@
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500"
+
+# Upper bound on concurrent connections to TMDB, and therefore on fetch workers
+POOL_MAXSIZE = 20
+
+
+class TokenBucket:
+    """Process-wide token bucket: `rate` calls per second with bursts of up to `burst`.
+
+    Callers reserve a token and then sleep outside the lock, so waiting threads
+    are released in order without holding each other up.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 0.0)
+        self.lock = threading.Lock()
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def _reserve(self, tokens, updated, now):
+        tokens = self._refill(tokens, updated, now) - 1
+        return tokens, (-tokens / self.rate if tokens < 0 else 0.0)
+
+    def _hold(self, tokens, updated, now, seconds):
+        # A negative balance of rate × seconds keeps everyone waiting that long
+        return min(self._refill(tokens, updated, now), -seconds * self.rate)
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens, wait = self._reserve(self.tokens, self.updated, now)
+            self.updated = now
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds`, e.g. after a 429 Retry-After."""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = self._hold(self.tokens, self.updated, now, seconds)
+            self.updated = now
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a small file shared by every process on a host."""
+
+    STATE = struct.Struct("<dd")
+
+    def __init__(self, path, rate, burst=None):
+        # Fail at startup rather than on every lookup, where fetch_posters would swallow it
+        if fcntl is None:
+            raise RuntimeError("TMDB_RATE_LIMIT_FILE needs file locking (fcntl), which this platform lacks")
+        super().__init__(rate, burst)
+        self.path = path
+
+    def _update(self, step):
+        with self.lock, open(self.path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read(self.STATE.size)
+                now = time.time()
+                tokens, updated = self.STATE.unpack(raw) if len(raw) == self.STATE.size else (self.burst, now)
+                tokens, result = step(tokens, updated, now)
+                f.seek(0)
+                f.truncate()
+                f.write(self.STATE.pack(tokens, now))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+    def acquire(self):
+        if not self.rate:
+            return
+        wait = self._update(self._reserve)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        if not self.rate:
+            return
+        self._update(lambda tokens, updated, now: (self._hold(tokens, updated, now, seconds), None))
+
+
+class LimiterRetry(Retry):
+    """Retry that draws a limiter token for every retried request.
+
+    It also pauses the shared limiter when TMDB answers with Retry-After.
+    """
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.limiter = self.limiter
+        return retry
+
+    def sleep_for_retry(self, response=None):
+        retry_after = self.get_retry_after(response) if response is not None else None
+        if retry_after and self.limiter is not None:
+            self.limiter.pause(retry_after)
+        return super().sleep_for_retry(response)
+
+    def sleep(self, response=None):
+        # Runs before every retry, after status codes and connection errors alike
+        super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+
+def create_session(pool_maxsize=POOL_MAXSIZE, limiter=None):
+    """Create a requests session with retry logic and connection pooling."""
+    retry_strategy = LimiterRetry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        limiter=limiter
+    )
+
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=10,
+        pool_maxsize=pool_maxsize
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+
+    return session
+
+
+class PosterClient:
+    """Thread-safe TMDB poster lookups over one pooled session."""
+
+    def __init__(self, api_key, limiter=None, max_workers=POOL_MAXSIZE, api_url=TMDB_API_URL):
+        self.api_key = api_key
+        self.api_url = api_url.rstrip("/")
+        # More workers than pooled connections would only queue on the pool
+        self.max_workers = max(1, min(max_workers, POOL_MAXSIZE))
+        self.limiter = limiter or TokenBucket(None)
+        self.session = create_session(POOL_MAXSIZE, self.limiter)
+
+    def lookup(self, movie_id):
+        """Return the poster URL for a movie, or None if TMDB has none; raise if the call fails."""
+        url = f"{self.api_url}/movie/{movie_id}?api_key={self.api_key}&language=en-US"
+
+        self.limiter.acquire()
+        response = self.session.get(url, timeout=15)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        if "poster_path" not in data or not data["poster_path"]:
+            return None
+
+        return POSTER_BASE_URL + data["poster_path"]
+
+    def try_lookup(self, movie_id):
+        """Return (True, poster URL or None) for an answer from TMDB, or (False, None) if the call failed."""
+        try:
+            return True, self.lookup(movie_id)
+        except Exception:
+            return False, None
+
+
+def fetch_concurrently(fetch, movie_ids, max_workers=POOL_MAXSIZE):
+    """Call fetch for every movie id in parallel and return results in input order."""
+    movie_ids = list(movie_ids)
+    if len(movie_ids) <= 1:
+        return [fetch(movie_id) for movie_id in movie_ids]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(movie_ids))) as pool:
+        return list(pool.map(fetch, movie_ids))
+
+
+def fetch_posters(client, cache, movie_ids):
+    """Resolve poster URLs through the cache, looking up misses concurrently.
+
+    Only answers TMDB actually gave are cached, so failed calls are retried
+    on the next request instead of being remembered as "no poster".
+    """
+    movie_ids = [str(movie_id) for movie_id in movie_ids]
+    posters = cache.get_many(movie_ids)
+    missing = [movie_id for movie_id in dict.fromkeys(movie_ids) if movie_id not in posters]
+
+    results = fetch_concurrently(client.try_lookup, missing, client.max_workers)
+    resolved = {movie_id: poster_url for movie_id, (ok, poster_url) in zip(missing, results) if ok}
+    cache.put_many(resolved)
+    posters.update(resolved)
+
+    return [posters.get(movie_id) for movie_id in movie_ids]
+
+
+def client_from_env(api_key):
+    """Build a PosterClient configured by the TMDB_* and POSTER_FETCH_WORKERS variables."""
+    rate = float(os.getenv("TMDB_RATE_LIMIT", "20"))
+    burst = float(os.getenv("TMDB_RATE_BURST", "0")) or None
+    state_file = os.getenv("TMDB_RATE_LIMIT_FILE")
+
+    # With a state file, every process on the host draws from the same bucket
+    if state_file:
+        limiter = FileTokenBucket(state_file, rate, burst)
+    else:
+        limiter = TokenBucket(rate, burst)
+
+    return PosterClient(
+        api_key,
+        limiter=limiter,
+        max_workers=int(os.getenv("POSTER_FETCH_WORKERS", str(POOL_MAXSIZE))),
+        api_url=os.getenv("TMDB_API_URL", TMDB_API_URL)
+    )
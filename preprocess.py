@@ -0,0 +1,131 @@
+"""Parse the TMDB 5000 CSVs into the per-movie fields the tags are built from.
+
+The genres, keywords, cast and crew columns are JSON arrays stored as strings.
+They are decoded with the json module's C scanner instead of ast.literal_eval,
+and only the needed fields are extracted: every genre and keyword name, the
+first three cast members and the first director. Cast and crew are decoded
+lazily, so the rest of a long array is never parsed. stem_tags then stems the
+tags of every movie, stemming each distinct word only once.
+"""
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from nltk.stem.porter import PorterStemmer
+
+CAST_LIMIT = 3
+
+# Every word stemmed so far in this process; the vocabulary is tiny next to the token count
+_stems = {}
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[\s,]*")
+_director = re.compile(r'"job"\s*:\s*"Director"')
+
+
+def names(text):
+    """Every "name" in a JSON array of objects, like the notebook's convert."""
+    return [item["name"] for item in json.loads(text)]
+
+
+def first_names(text, limit=CAST_LIMIT):
+    """The first `limit` names, decoding only as many array elements as needed (convert3)."""
+    found = []
+    position = _whitespace.match(text, text.index("[") + 1).end()
+    while len(found) < limit and position < len(text) and text[position] != "]":
+        item, position = _decoder.raw_decode(text, position)
+        found.append(item["name"])
+        position = _whitespace.match(text, position).end()
+    return found
+
+
+def director(text):
+    """The first crew member whose job is Director, as a one-element list (fetch_director)."""
+    match = _director.search(text)
+    if match is None:
+        return []
+
+    # Decode just the object around the match; fall back to the whole array if that fails
+    start = text.rfind("{", 0, match.start())
+    try:
+        item, _ = _decoder.raw_decode(text, start)
+        if item.get("job") == "Director":
+            return [item["name"]]
+    except (ValueError, KeyError):
+        pass
+    return next(([item["name"]] for item in json.loads(text) if item.get("job") == "Director"), [])
+
+
+def parse_columns(frame):
+    """Replace the JSON columns of a frame with the extracted name lists."""
+    frame = frame.copy()
+    frame["genres"] = [names(text) for text in frame["genres"]]
+    frame["keywords"] = [names(text) for text in frame["keywords"]]
+    frame["cast"] = [first_names(text) for text in frame["cast"]]
+    frame["crew"] = [director(text) for text in frame["crew"]]
+    return frame
+
+
+def parse_movies(movies_df, workers=1, chunk_size=1000):
+    """parse_columns over chunks of rows, spread over `workers` processes."""
+    chunks = [movies_df.iloc[start:start + chunk_size] for start in range(0, len(movies_df), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        parsed = [parse_columns(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parsed = list(pool.map(parse_columns, chunks))
+    return pd.concat(parsed) if parsed else parse_columns(movies_df)
+
+
+def load_tmdb(movies_path, credits_path, workers=1):
+    """Read and merge the two CSVs and parse them into movie_id, title, overview and name lists."""
+    movies = pd.read_csv(movies_path, usecols=["title", "overview", "genres", "keywords"])
+    credits = pd.read_csv(credits_path, usecols=["movie_id", "title", "cast", "crew"])
+
+    movies = movies.merge(credits, on="title")
+    movies = movies[["movie_id", "title", "overview", "genres", "keywords", "cast", "crew"]]
+    movies = movies.dropna().reset_index(drop=True)
+    return parse_movies(movies, workers)
+
+
+def make_tags(movies):
+    """Join overview words and space-free names into the lowercase tags string of every movie."""
+
+    def tags(movie):
+        words = movie.overview.split()
+        for column in (movie.genres, movie.keywords, movie.cast, movie.crew):
+            words.extend(name.replace(" ", "") for name in column)
+        return " ".join(words).lower()
+
+    return pd.DataFrame({
+        "movie_id": movies["movie_id"].to_numpy(),
+        "title": movies["title"].to_numpy(),
+        "tags": [tags(movie) for movie in movies.itertuples(index=False)],
+    })
+
+
+def _stem_words(words):
+    stemmer = PorterStemmer()
+    return [stemmer.stem(word) for word in words]
+
+
+def stem_tags(tags, workers=1, chunk_size=20_000):
+    """Porter-stem every whitespace token of every tags string, like the notebook's stem.
+
+    Each distinct word is stemmed once and remembered for later calls; with
+    workers > 1 the new words are stemmed by a process pool.
+    """
+    tokenized = [text.split() for text in tags]
+    new_words = list({word for words in tokenized for word in words} - _stems.keys())
+
+    chunks = [new_words[start:start + chunk_size] for start in range(0, len(new_words), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        stemmed = [_stem_words(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            stemmed = list(pool.map(_stem_words, chunks))
+    for chunk, stems in zip(chunks, stemmed):
+        _stems.update(zip(chunk, stems))
+
+    return [" ".join(map(_stems.__getitem__, words)) for words in tokenized]
@@ -0,0 +1,88 @@
+"""Fetch poster URLs for the whole catalog into posters.json so the app can skip TMDB.
+
+    python prewarm_posters.py                 # fetch missing and stale posters
+    python prewarm_posters.py --max-age-days 0 --negative-max-age-days 0   # refresh everything
+
+Progress is checkpointed after every chunk, so an interrupted run picks up
+where it stopped. Point --api-url at a local stand-in server for testing.
+"""
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+
+from catalog import find_movies, read_movies
+from poster_cache import DAY, load_poster_artifact, save_poster_artifact
+from posters import POOL_MAXSIZE, TMDB_API_URL, PosterClient, TokenBucket, fetch_concurrently
+
+
+def stale_movie_ids(movie_ids, posters, max_age, negative_max_age, now):
+    """Return the ids with no entry, or whose entry is older than its allowed age."""
+    stale = []
+    for movie_id in movie_ids:
+        entry = posters.get(movie_id)
+        if entry is None:
+            stale.append(movie_id)
+            continue
+        limit = max_age if entry["poster_url"] else negative_max_age
+        if now - entry["fetched_at"] >= limit:
+            stale.append(movie_id)
+    return stale
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", help="movie data (default: movies.arrow or movies.pkl)")
+    parser.add_argument("--output", default="posters.json", help="poster artifact to create or update")
+    parser.add_argument("--max-age-days", type=float, default=30, help="refetch posters older than this")
+    parser.add_argument(
+        "--negative-max-age-days", type=float, default=7,
+        help="refetch movies recorded without a poster after this long"
+    )
+    parser.add_argument("--rate", type=float, default=20, help="TMDB requests per second")
+    parser.add_argument("--workers", type=int, default=POOL_MAXSIZE, help="concurrent requests")
+    parser.add_argument("--chunk-size", type=int, default=200, help="ids fetched between checkpoints")
+    parser.add_argument("--api-url", default=TMDB_API_URL, help="TMDB API base URL")
+    args = parser.parse_args()
+
+    api_key = os.getenv("API_KEY")
+    if not api_key:
+        parser.error("API_KEY is not set (add it to .env or the environment)")
+
+    movies_df = read_movies(args.movies or find_movies(), ["movie_id"])
+    movie_ids = list(dict.fromkeys(str(movie_id) for movie_id in movies_df["movie_id"]))
+
+    posters = load_poster_artifact(args.output) if os.path.exists(args.output) else {}
+    todo = stale_movie_ids(
+        movie_ids, posters, args.max_age_days * DAY, args.negative_max_age_days * DAY, time.time()
+    )
+    print(f"{len(movie_ids)} movies, {len(todo)} missing or stale")
+
+    client = PosterClient(
+        api_key, limiter=TokenBucket(args.rate), max_workers=args.workers, api_url=args.api_url
+    )
+
+    failed = 0
+    for start in range(0, len(todo), args.chunk_size):
+        chunk = todo[start:start + args.chunk_size]
+        fetched_at = time.time()
+        for movie_id, (ok, poster_url) in zip(chunk, fetch_concurrently(client.try_lookup, chunk, client.max_workers)):
+            if ok:
+                posters[movie_id] = {"poster_url": poster_url, "fetched_at": fetched_at}
+            else:
+                failed += 1
+
+        save_poster_artifact(args.output, posters)
+        print(f"{min(start + args.chunk_size, len(todo))}/{len(todo)} fetched, {failed} failed")
+
+    if not todo:
+        save_poster_artifact(args.output, posters)
+
+    print(f"Wrote {len(posters)} posters to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def top_k_indices(scores, k, exclude=None):
+    """Return the indices of the k highest scores, best first.
+
+    Uses a partial partition so only the k winners are sorted. Ties are broken by
+    ascending index, so a larger k always extends a smaller k's ranking.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    k = min(int(k), n - (1 if exclude is not None and 0 <= exclude < n else 0))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Ask for one extra candidate so the excluded row can be dropped afterwards
+    candidates = min(k + 1, n) if exclude is not None else k
+    negated = -scores
+    if candidates < n:
+        kth = np.partition(negated, candidates - 1)[candidates - 1]
+        winners = np.flatnonzero(negated <= kth)
+    else:
+        winners = np.arange(n)
+
+    ranked = winners[np.lexsort((winners, negated[winners]))]
+    if exclude is not None:
+        ranked = ranked[ranked != exclude]
+
+    return ranked[:k]
+
+
+def top_k_rows(scores, k, exclude=None):
+    """Row-wise top_k_indices over a 2-D block of scores, in one vectorized pass.
+
+    ``exclude`` gives one column per row to leave out (a movie's own row).
+    Returns an (m, k) index array ranked exactly like top_k_indices.
+    """
+    scores = np.asarray(scores)
+    m, n = scores.shape
+    k = min(int(k), n - (1 if exclude is not None else 0))
+    if k <= 0:
+        return np.empty((m, 0), dtype=np.intp)
+
+    # Every score at least as good as the row's k-th best is a candidate, ties
+    # included; one extra is kept so the excluded column can be dropped afterwards
+    candidates = min(k + 1, n) if exclude is not None else k
+    kth = np.partition(scores, n - candidates, axis=1)[:, n - candidates:n - candidates + 1]
+    seed, candidate = np.nonzero(scores >= kth)
+    if exclude is not None:
+        keep = candidate != np.asarray(exclude)[seed]
+        seed, candidate = seed[keep], candidate[keep]
+    order = np.lexsort((candidate, -scores[seed, candidate], seed))
+
+    # Candidates are now grouped by row, best first; keep the first k of each group
+    starts = np.concatenate(([0], np.cumsum(np.bincount(seed, minlength=m))[:-1]))
+    ranked = candidate[order][starts[:, None] + np.arange(k)]
+
+    return ranked
+
+
+def resolve_seeds(movie_lookup, seeds):
+    """Map seed titles (str) or TMDB movie ids (int) to rows; unknown seeds become -1."""
+    rows = np.empty(len(seeds), dtype=np.intp)
+    for i, seed in enumerate(seeds):
+        row = movie_lookup.row_for_title(seed) if isinstance(seed, str) else movie_lookup.row_for_id(seed)
+        rows[i] = -1 if row is None else row
+    return rows
+
+
+def recommend_many(similarity, rows, k, block_size=256):
+    """Return an (len(rows), k) array of recommendations for many seed rows at once.
+
+    Seeds are ranked in blocks of gathered rows so memory stays bounded on
+    dense matrices. Rows of -1 (unknown seeds) and slots past the end of a
+    short ranking are filled with -1.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    k = min(k, similarity.max_k)
+    result = np.full((len(rows), k), -1, dtype=np.intp)
+
+    valid = np.flatnonzero((rows >= 0) & (rows < len(similarity)))
+    for start in range(0, len(valid), block_size):
+        block = valid[start:start + block_size]
+        ranked = similarity.top_k_many(rows[block], k)
+        result[block, :ranked.shape[1]] = ranked
+
+    return result
+
+
+# Rank offset used by reciprocal-rank fusion (Cormack et al. use 60)
+RRF_K = 60
+
+
+def recommend_for_seeds(similarity, rows, k, weights=None, method="sum", depth=100):
+    """Return the k movies most similar to a set of seed rows taken together.
+
+    ``method`` is "sum" (weighted sum of similarities), "max" (best weighted
+    similarity to any seed) or "rrf" (reciprocal-rank fusion of each seed's
+    top ``depth`` ranking, which needs no scores). The seeds themselves are
+    never recommended.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    if not len(rows) or (rows < 0).any() or (rows >= len(similarity)).any():
+        raise ValueError("seeds must be a non-empty list of valid movie rows")
+    if weights is None:
+        weights = np.ones(len(rows))
+    elif isinstance(weights, (list, tuple, np.ndarray)) and all(
+        isinstance(weight, (int, float, np.number)) and not isinstance(weight, bool) for weight in weights
+    ):
+        try:
+            weights = np.asarray(weights, dtype=np.float64)
+        except OverflowError:
+            # Python ints beyond float64 range, e.g. a 300-digit JSON number
+            raise ValueError("weights must be finite numbers") from None
+    else:
+        raise ValueError("weights must be a list of numbers")
+    if weights.shape != rows.shape or not np.isfinite(weights).all():
+        raise ValueError("weights must be finite and match the seeds one to one")
+
+    if method == "rrf":
+        ranked = recommend_many(similarity, rows, depth)
+        found = ranked >= 0
+        contributions = np.broadcast_to(weights[:, None] / (RRF_K + 1 + np.arange(ranked.shape[1])), ranked.shape)
+        scores = np.full(len(similarity), -np.inf)
+        touched = np.unique(ranked[found])
+        scores[touched] = np.bincount(ranked[found], weights=contributions[found], minlength=len(similarity))[touched]
+    elif method in ("sum", "max"):
+        scores = similarity.aggregate_scores(rows, weights, method)
+    else:
+        raise ValueError(f"Unknown aggregation method: {method!r}")
+
+    scores[rows] = -np.inf
+    ranked = top_k_indices(scores, k)
+    return ranked[np.isfinite(scores[ranked])]
+
+
+def recommend_rows(similarity, movie_lookup, title, k, offset=0):
+    """Return rows offset..offset+k of the ranking for a title.
+
+    Raises KeyError for an unknown title and ValueError when the similarity
+    data does not cover the movie's row.
+    """
+    movie_index = movie_lookup.row_for_title(title)
+    if movie_index is None:
+        raise KeyError(title)
+
+    if movie_index >= len(similarity):
+        raise ValueError("similarity matrix and movie list are out of sync")
+
+    return similarity.top_k(movie_index, offset + k)[offset:]
+
+
+class DenseSimilarity:
+    """Serve recommendations from a full N×N similarity matrix."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.matrix)
+
+    @property
+    def max_k(self):
+        return max(len(self.matrix) - 1, 0)
+
+    def top_k(self, row, k):
+        return top_k_indices(self.matrix[row], k, exclude=row)
+
+    def top_k_many(self, rows, k):
+        return top_k_rows(self.matrix[rows], k, exclude=rows)
+
+    def aggregate_scores(self, rows, weights, method):
+        """Combine the seeds' full similarity rows into one score per movie."""
+        block = np.asarray(self.matrix[rows], dtype=np.float64)
+        if method == "sum":
+            return weights @ block
+        return (block * weights[:, None]).max(axis=0)
+
+    def save(self, path, dtype=np.float32):
+        np.save(path, np.ascontiguousarray(self.matrix, dtype=dtype))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved matrix; with mmap, rows are paged in on first access."""
+        return cls(np.load(path, mmap_mode="r" if mmap else None))
+
+
+class NeighborStore:
+    """Serve recommendations from precomputed per-movie top-K neighbor lists.
+
+    Row i of ``indices`` holds the K movies most similar to movie i, best
+    first and excluding i itself; ``scores`` holds the matching similarities.
+    """
+
+    def __init__(self, indices, scores):
+        if indices.shape != scores.shape:
+            raise ValueError(
+                f"Neighbor indices {indices.shape} and scores {scores.shape} differ in shape"
+            )
+        self.indices = indices
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def max_k(self):
+        return self.indices.shape[1]
+
+    def top_k(self, row, k):
+        return self.indices[row, :k]
+
+    def top_k_many(self, rows, k):
+        return self.indices[rows, :k]
+
+    def aggregate_scores(self, rows, weights, method):
+        """Combine the seeds' neighbor lists; movies outside every list score -inf."""
+        indices = self.indices[rows].ravel()
+        scores = (self.scores[rows].astype(np.float64) * weights[:, None]).ravel()
+        combined = np.full(len(self), -np.inf)
+        if method == "sum":
+            touched = np.unique(indices)
+            combined[touched] = np.bincount(indices, weights=scores, minlength=len(self))[touched]
+        else:
+            np.maximum.at(combined, indices, scores)
+        return combined
+
+    @classmethod
+    def from_dense(cls, matrix, k, scores_dtype=np.float16):
+        """Keep only the k best neighbors of every row of a dense matrix."""
+        n = len(matrix)
+        k = min(k, max(n - 1, 0))
+        indices = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=scores_dtype)
+        for row in range(n):
+            distances = np.asarray(matrix[row])
+            indices[row] = top_k_indices(distances, k, exclude=row)
+            scores[row] = distances[indices[row]]
+        return cls(indices, scores)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, indices=self.indices, scores=self.scores)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["indices"], data["scores"])
+
+
+class RecommendationLists:
+    """Serve recommendations by slicing precomputed ranked lists; no ranking at request time.
+
+    Row i of ``lists`` holds the M movies most similar to movie i, best first.
+    Indices are stored as int16 whenever the catalog is small enough.
+    """
+
+    def __init__(self, lists):
+        self.lists = lists
+
+    def __len__(self):
+        return len(self.lists)
+
+    @property
+    def max_k(self):
+        return self.lists.shape[1]
+
+    def top_k(self, row, k):
+        return self.lists[row, :k]
+
+    def top_k_many(self, rows, k):
+        return self.lists[rows, :k]
+
+    def aggregate_scores(self, rows, weights, method):
+        raise ValueError("Recommendation lists store no scores; aggregate them with method='rrf'")
+
+    @classmethod
+    def from_neighbors(cls, store):
+        dtype = np.int16 if len(store) <= np.iinfo(np.int16).max + 1 else np.int32
+        return cls(store.indices.astype(dtype))
+
+    @classmethod
+    def from_dense(cls, matrix, m):
+        return cls.from_neighbors(NeighborStore.from_dense(matrix, m))
+
+    def save(self, path):
+        np.save(path, np.ascontiguousarray(self.lists))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        return cls(np.load(path, mmap_mode="r" if mmap else None))
+
+
+class CachedRecommendations:
+    """Process-wide LRU cache of ranked neighbor arrays in front of another backend.
+
+    Each movie keeps the longest ranking computed so far, so a smaller k is a
+    slice of it. Entries are evicted least recently used first once their
+    total size passes ``max_bytes``.
+    """
+
+    def __init__(self, backend, max_bytes=32 * 1024 * 1024):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.backend)
+
+    @property
+    def max_k(self):
+        return self.backend.max_k
+
+    def top_k(self, row, k):
+        k = min(k, self.max_k)
+        with self.lock:
+            ranked = self.entries.get(row)
+            if ranked is not None and len(ranked) >= k:
+                self.entries.move_to_end(row)
+                self.hits += 1
+                return ranked[:k]
+            self.misses += 1
+
+        ranked = np.array(self.backend.top_k(row, k), dtype=np.int32)
+        # Shared between sessions, so nobody may modify it in place
+        ranked.flags.writeable = False
+
+        with self.lock:
+            previous = self.entries.pop(row, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self.entries[row] = ranked
+            self.nbytes += ranked.nbytes
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+        return ranked
+
+    def top_k_many(self, rows, k):
+        # Bulk jobs would only churn the LRU, so they go straight to the backend
+        return self.backend.top_k_many(rows, k)
+
+    def aggregate_scores(self, rows, weights, method):
+        return self.backend.aggregate_scores(rows, weights, method)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+            }
+
+
+class MovieLookup:
+    """Constant-time title → row and movie_id → row lookups, plus columnar row access.
+
+    The notebook merges movies and credits on title, so both titles and
+    movie ids can repeat; the first row wins, matching a boolean-mask scan.
+    """
+
+    def __init__(self, titles, movie_ids):
+        self.titles = np.array(titles, dtype=object)
+        self.movie_ids = np.array(movie_ids, dtype=np.int64)
+
+        self.row_by_title = {}
+        for row, title in enumerate(titles):
+            self.row_by_title.setdefault(title, row)
+
+        self.row_by_id = {}
+        for row, movie_id in enumerate(movie_ids):
+            self.row_by_id.setdefault(int(movie_id), row)
+
+    @classmethod
+    def from_dataframe(cls, movies_df):
+        return cls(movies_df["title"].tolist(), movies_df["movie_id"].tolist())
+
+    def row_for_title(self, title):
+        return self.row_by_title.get(title)
+
+    def row_for_id(self, movie_id):
+        return self.row_by_id.get(int(movie_id))
+
+    def gather(self, rows):
+        """Return the movie ids and titles of an array of rows in one vectorized take."""
+        rows = np.asarray(rows, dtype=np.intp)
+        return self.movie_ids.take(rows), self.titles.take(rows)
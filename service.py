@@ -0,0 +1,262 @@
+"""Headless recommendation HTTP service, independent of the Streamlit UI.
+
+    python service.py --port 8000 --workers 4
+
+    GET /recommend?title=Avatar&k=5&offset=0
+    GET /poster?movie_id=19995
+    GET /health                     status plus top-K cache hits and misses
+    POST /recommend/batch  {"seeds": ["Avatar", 19995, ...], "k": 10}
+    POST /recommend/seeds  {"seeds": ["Avatar", "Titanic"], "weights": [2, 1], "method": "sum", "k": 10}
+
+Data is loaded once before the workers are forked, so read-only arrays and
+memory-mapped artifacts are shared by every worker process.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+from catalog import ArtifactError, load_catalog
+from poster_cache import open_poster_cache
+from posters import client_from_env, fetch_posters
+from recommender import recommend_for_seeds, recommend_many, recommend_rows, resolve_seeds
+
+MAX_K = 100
+MAX_BATCH_SEEDS = 100_000
+
+
+class PosterService:
+    """Poster client and cache, opened lazily so each forked worker gets its own connections."""
+
+    def __init__(self, api_key, directory):
+        self.api_key = api_key
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.client = None
+        self.cache = None
+
+    def lookup(self, movie_id):
+        with self.lock:
+            if self.client is None:
+                self.client = client_from_env(self.api_key)
+                self.cache = open_poster_cache(self.directory)
+        return fetch_posters(self.client, self.cache, [movie_id])[0]
+
+
+class RecommendationHandler(BaseHTTPRequestHandler):
+    # Set on the class by make_server
+    similarity = None
+    movie_lookup = None
+    posters = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        routes = {
+            "/recommend": self.recommend,
+            "/poster": self.poster,
+            "/health": self.health,
+        }
+
+        route = routes.get(url.path)
+        if route is None:
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        try:
+            status, body = route(params)
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        self.send_json(status, body)
+
+    def do_POST(self):
+        routes = {
+            "/recommend/batch": self.recommend_batch,
+            "/recommend/seeds": self.recommend_seeds,
+        }
+
+        route = routes.get(urlparse(self.path).path)
+        if route is None:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("request body must be a JSON object")
+            status, body = route(request)
+        except (TypeError, ValueError) as e:
+            # Any malformed body gets an answer instead of a dropped connection
+            status, body = 400, {"error": str(e)}
+        self.send_json(status, body)
+
+    def recommend_batch(self, request):
+        seeds = seeds_param(request)
+        k = int_param(request, "k", 5, 1, MAX_K)
+
+        rows = resolve_seeds(self.movie_lookup, seeds)
+        recommendations = recommend_many(self.similarity, rows, k)
+        movie_ids = self.movie_lookup.movie_ids
+
+        return 200, {
+            "k": k,
+            "results": [
+                {
+                    "seed": seed,
+                    "found": bool(row >= 0),
+                    "movie_ids": movie_ids.take(ranked[ranked >= 0]).tolist(),
+                }
+                for seed, row, ranked in zip(seeds, rows.tolist(), recommendations)
+            ],
+        }
+
+    def recommend_seeds(self, request):
+        seeds = seeds_param(request)
+        k = int_param(request, "k", 5, 1, MAX_K)
+        method = request.get("method", "sum")
+
+        rows = resolve_seeds(self.movie_lookup, seeds)
+        missing = [seed for seed, row in zip(seeds, rows.tolist()) if row < 0]
+        if missing:
+            return 404, {"error": "Movies not found", "seeds": missing}
+
+        recommended = recommend_for_seeds(self.similarity, rows, k, request.get("weights"), method)
+        movie_ids, titles = self.movie_lookup.gather(recommended)
+        return 200, {
+            "method": method,
+            "results": [
+                {"movie_id": int(movie_id), "title": movie_title}
+                for movie_id, movie_title in zip(movie_ids.tolist(), titles.tolist())
+            ],
+        }
+
+    def health(self, params):
+        body = {"status": "ok"}
+        # Only the dense and ANN backends sit behind the LRU of ranked neighbors
+        if hasattr(self.similarity, "stats"):
+            body["cache"] = self.similarity.stats()
+        return 200, body
+
+    def recommend(self, params):
+        title = params.get("title")
+        if not title:
+            raise ValueError("title is required")
+        k = int_param(params, "k", 5, 1, MAX_K)
+        offset = int_param(params, "offset", 0, 0, None)
+
+        try:
+            rows = recommend_rows(self.similarity, self.movie_lookup, title, k, offset)
+        except KeyError:
+            return 404, {"error": f"Movie not found: {title}"}
+        except ValueError as e:
+            return 500, {"error": str(e)}
+
+        movie_ids, titles = self.movie_lookup.gather(rows)
+        return 200, {
+            "title": title,
+            "offset": offset,
+            "total": self.similarity.max_k,
+            "results": [
+                {"movie_id": int(movie_id), "title": movie_title}
+                for movie_id, movie_title in zip(movie_ids.tolist(), titles.tolist())
+            ],
+        }
+
+    def poster(self, params):
+        movie_id = params.get("movie_id", "")
+        if not movie_id.isdigit():
+            raise ValueError("movie_id must be a TMDB movie id")
+        if self.posters is None:
+            return 503, {"error": "Poster lookups are disabled: API_KEY is not set"}
+
+        return 200, {"movie_id": int(movie_id), "poster_url": self.posters.lookup(movie_id)}
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def seeds_param(request):
+    seeds = request.get("seeds")
+    if not isinstance(seeds, list) or not seeds:
+        raise ValueError("seeds must be a non-empty list of titles or movie ids")
+    if not all(isinstance(seed, (str, int)) and not isinstance(seed, bool) for seed in seeds):
+        raise ValueError("seeds must be titles (strings) or movie ids (integers)")
+    if len(seeds) > MAX_BATCH_SEEDS:
+        raise ValueError(f"at most {MAX_BATCH_SEEDS} seeds per request")
+    return seeds
+
+
+def int_param(params, name, default, low, high):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError, OverflowError):
+        # JSON bodies can carry null, lists, objects or 1e999 (inf) where an integer belongs
+        raise ValueError(f"{name} must be an integer") from None
+    if value < low or (high is not None and value > high):
+        raise ValueError(f"{name} must be between {low} and {high}" if high else f"{name} must be at least {low}")
+    return value
+
+
+def make_server(host, port, directory=".", api_key=None):
+    """Load the catalog and bind a threaded server; nothing is served until serve_forever."""
+    _, similarity, movie_lookup = load_catalog(directory)
+
+    RecommendationHandler.similarity = similarity
+    RecommendationHandler.movie_lookup = movie_lookup
+    RecommendationHandler.posters = PosterService(api_key, directory) if api_key else None
+
+    return ThreadingHTTPServer((host, port), RecommendationHandler)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the socket")
+    parser.add_argument("--data-dir", default=".", help="directory holding movies.pkl and similarity data")
+    args = parser.parse_args()
+
+    try:
+        server = make_server(args.host, args.port, args.data_dir, os.getenv("API_KEY"))
+    except ArtifactError as e:
+        parser.exit(1, f"❌ {str(e)}\n")
+
+    # Fork after loading so every worker shares the preloaded pages
+    children = []
+    for _ in range(args.workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Serving recommendations on http://{args.host}:{args.port} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+
+if __name__ == "__main__":
+    main()
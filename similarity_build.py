@@ -0,0 +1,172 @@
+"""Build the top-K neighbor store from tag vectors with bounded memory.
+
+    python similarity_build.py --k 100 --block-size 256 --tile-size 50000 --workers 8
+
+Rows are processed in blocks and, optionally, columns in tiles; only the
+running top-K of each row is kept, and finished blocks are written straight
+to memory-mapped files. Peak memory is block_size × tile_size similarities
+per worker no matter how large the catalog is.
+"""
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from catalog import find_movies, read_movies
+from features import normalize_rows, save_tag_vectors, vectorize_tags
+from recommender import NeighborStore, top_k_rows
+
+
+def merge_top_k(indices, scores, new_indices, new_scores, k):
+    """Merge two row-wise rankings, keeping the k best of each row (ties by lower index)."""
+    indices = np.concatenate([indices, new_indices], axis=1)
+    scores = np.concatenate([scores, new_scores], axis=1)
+    order = np.lexsort((indices, -scores), axis=1)[:, :k]
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def block_top_k(normalized, transposed, seeds, k, tile_size, scores_dtype=np.float32):
+    """Top-k neighbors of the given rows, scanning the columns one tile at a time.
+
+    Scores are ranked at scores_dtype, the precision they are stored at, so
+    scores that round to the same value tie by index. Every neighbor list
+    is then a function of the stored scores alone, and patching it later
+    gives the same order as a rebuild.
+    """
+    n = normalized.shape[0]
+    rows = normalized[seeds]
+    indices = np.empty((len(seeds), 0), dtype=np.int64)
+    scores = np.empty((len(seeds), 0), dtype=scores_dtype)
+
+    for tile_start in range(0, n, tile_size):
+        tile_stop = min(tile_start + tile_size, n)
+        tile = (rows @ transposed[:, tile_start:tile_stop]).toarray().astype(scores_dtype, copy=False)
+
+        # A movie is never its own neighbor
+        own = (seeds >= tile_start) & (seeds < tile_stop)
+        tile[own.nonzero()[0], seeds[own] - tile_start] = -np.inf
+
+        ranked = top_k_rows(tile, k)
+        indices, scores = merge_top_k(
+            indices, scores, ranked + tile_start, np.take_along_axis(tile, ranked, axis=1), k
+        )
+
+    return indices, scores
+
+
+# Per-process build state: the shared feature matrices and the output memmaps
+_state = {}
+
+
+def _share_matrix(matrix, directory, name):
+    """Save a CSR/CSC matrix's arrays as .npy files that workers can memory-map."""
+    for part in ("data", "indices", "indptr"):
+        np.save(os.path.join(directory, f"{name}.{part}.npy"), getattr(matrix, part))
+
+
+def _open_matrix(directory, name, kind, shape):
+    parts = [
+        np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode="r")
+        for part in ("data", "indices", "indptr")
+    ]
+    return kind(tuple(parts), shape=shape)
+
+
+def _init_worker(directory, shape, k, block_size, tile_size):
+    _state.update(
+        normalized=_open_matrix(directory, "normalized", sparse.csr_matrix, shape),
+        transposed=_open_matrix(directory, "transposed", sparse.csc_matrix, shape[::-1]),
+        indices=np.load(os.path.join(directory, "indices.npy"), mmap_mode="r+"),
+        scores=np.load(os.path.join(directory, "scores.npy"), mmap_mode="r+"),
+        k=k, block_size=block_size, tile_size=tile_size,
+    )
+
+
+def _build_block(start):
+    """Compute one row block and write it into the shared output; rows never overlap between blocks."""
+    stop = min(start + _state["block_size"], _state["normalized"].shape[0])
+    indices, scores = block_top_k(
+        _state["normalized"], _state["transposed"], np.arange(start, stop), _state["k"], _state["tile_size"],
+        _state["scores"].dtype
+    )
+    _state["indices"][start:stop] = indices
+    _state["scores"][start:stop] = scores
+    _state["indices"].flush()
+    _state["scores"].flush()
+    return start
+
+
+def build_neighbor_store(vectors, k, path, block_size=256, tile_size=None, scores_dtype=np.float16, workers=1):
+    """Write the top-k neighbor store of a feature matrix to path and return it.
+
+    With workers > 1, row blocks are spread over a process pool that reads
+    the feature matrix from shared memory-mapped files. Every row is computed
+    independently, so the output does not depend on the worker count.
+    """
+    normalized = normalize_rows(vectors)
+    transposed = sparse.csc_matrix(normalized.T)
+    n = normalized.shape[0]
+    k = min(k, max(n - 1, 0))
+    tile_size = tile_size or n
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as directory:
+        # Finished blocks go straight to disk instead of accumulating in memory
+        np.lib.format.open_memmap(os.path.join(directory, "indices.npy"), mode="w+", dtype=np.int32, shape=(n, k))
+        np.lib.format.open_memmap(os.path.join(directory, "scores.npy"), mode="w+", dtype=scores_dtype, shape=(n, k))
+        _share_matrix(normalized, directory, "normalized")
+        _share_matrix(transposed, directory, "transposed")
+
+        starts = range(0, n, block_size)
+        init_args = (directory, normalized.shape, k, block_size, tile_size)
+        if workers > 1:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+                for _ in pool.map(_build_block, starts):
+                    pass
+        else:
+            _init_worker(*init_args)
+            for start in starts:
+                _build_block(start)
+
+        store = NeighborStore(
+            np.load(os.path.join(directory, "indices.npy")), np.load(os.path.join(directory, "scores.npy"))
+        )
+        _state.clear()
+
+    store.save(path)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", help="movie data with a tags column (default: movies.arrow or movies.pkl)")
+    parser.add_argument("--output", default="similarity_topk.npz", help="neighbor store to write")
+    parser.add_argument(
+        "--vectors", default="tag_vectors.npz", help="tag vectors and vocabulary to write for update_catalog.py"
+    )
+    parser.add_argument("--k", type=int, default=100, help="neighbors kept per movie")
+    parser.add_argument("--max-features", type=int, default=5000, help="vocabulary size")
+    parser.add_argument("--block-size", type=int, default=256, help="rows scored at once")
+    parser.add_argument("--tile-size", type=int, default=0, help="columns scored at once (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="build processes")
+    parser.add_argument(
+        "--scores-dtype", choices=["float16", "float32"], default="float16",
+        help="precision of the stored similarity scores"
+    )
+    args = parser.parse_args()
+
+    movies_df = read_movies(args.movies or find_movies(), ["tags"])
+    vectors, vectorizer = vectorize_tags(movies_df["tags"], args.max_features)
+    save_tag_vectors(args.vectors, vectors, vectorizer.vocabulary_)
+
+    store = build_neighbor_store(
+        vectors, args.k, args.output, args.block_size, args.tile_size or None,
+        np.dtype(args.scores_dtype), args.workers
+    )
+    print(f"Wrote {len(store)}×{store.max_k} neighbors to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = [
+    "space", "alien", "war", "love", "heist", "detective", "dragon", "robot", "ship", "island",
+    "family", "revenge", "comedy", "drama", "thriller", "horror", "science", "fiction", "murder", "school",
+    "sailing", "running", "dreams", "kings", "wizards", "haunted", "cities", "spies", "zombies", "pirates",
+]
+
+
+@pytest.fixture
+def synthetic_tags():
+    """Raw tag strings of a small random catalog, with a few duplicates so scores tie."""
+    rng = np.random.default_rng(7)
+    tags = [" ".join(rng.choice(WORDS, size=rng.integers(3, 12))) for _ in range(300)]
+    tags[10] = tags[20] = tags[30]
+    tags[40] = ""
+    return tags
@@ -0,0 +1,23 @@
+import json
+
+import numpy as np
+import pytest
+
+from artifact import MAGIC, VERSION, ArtifactError, _prefix, load_array, save_array
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "similarity.bin")
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    save_array(path, array)
+    np.testing.assert_array_equal(load_array(path, np.float32, 2), array)
+    np.testing.assert_array_equal(load_array(path, mmap=False), array)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_negative_dimensions_are_rejected(tmp_path, mmap):
+    path = tmp_path / "similarity.bin"
+    header = json.dumps({"dtype": "<f4", "shape": [-1, -4], "payload_bytes": 16, "crc32": 0}).encode("utf-8")
+    path.write_bytes(_prefix.pack(MAGIC, VERSION, 0, len(header)) + header + bytes(16))
+    with pytest.raises(ArtifactError, match="negative dimension"):
+        load_array(str(path), mmap=mmap)
@@ -0,0 +1,26 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from catalog import ArtifactError, safe_pickle_load
+
+
+def test_python2_pickle_is_read_with_latin1(tmp_path):
+    path = tmp_path / "py2.pkl"
+    # Protocol 2 SHORT_BINSTRING b"caf\xe9", as Python 2 pickles a str
+    path.write_bytes(b"\x80\x02U\x04caf\xe9q\x00.")
+    assert safe_pickle_load(str(path), "legacy data") == "café"
+
+
+def test_truncated_pickle_fails_after_one_pass(tmp_path, monkeypatch):
+    path = tmp_path / "similarity.pkl"
+    data = pickle.dumps(np.arange(1000))
+    path.write_bytes(data[:len(data) // 2])
+
+    passes = []
+    load = pickle.load
+    monkeypatch.setattr(pickle, "load", lambda *args, **kwargs: passes.append(kwargs) or load(*args, **kwargs))
+    with pytest.raises(ArtifactError, match="truncated"):
+        safe_pickle_load(str(path), "similarity matrix")
+    assert passes == [{}]
@@ -0,0 +1,96 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import write_movies
+from features import cosine_similarity_matrix, vectorize_tags
+from service import make_server
+from similarity_build import build_neighbor_store
+
+
+def write_movies_for(directory, tags):
+    movies = pd.DataFrame({
+        "movie_id": np.arange(len(tags)) + 1000,
+        "title": [f"T{row}" for row in range(len(tags))],
+        "tags": tags,
+    })
+    write_movies(movies, str(directory / "movies.arrow"))
+    vectors, _ = vectorize_tags(movies["tags"])
+    return vectors
+
+
+def start_server(directory):
+    server = make_server("127.0.0.1", 0, str(directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(tmp_path, synthetic_tags):
+    vectors = write_movies_for(tmp_path, synthetic_tags)
+    build_neighbor_store(vectors, 20, str(tmp_path / "similarity_topk.npz"))
+
+    server = start_server(tmp_path)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/recommend/batch", b"not json"),
+    ("/recommend/batch", b"[1, 2]"),
+    ("/recommend/batch", b'{"seeds": []}'),
+    ("/recommend/batch", b'{"seeds": ["T1"], "k": null}'),
+    ("/recommend/batch", b'{"seeds": ["T1"], "k": [1]}'),
+    ("/recommend/batch", b'{"seeds": ["T1"], "k": 1e999}'),
+    ("/recommend/seeds", b'{"seeds": ["T1"], "k": -1e999}'),
+    ("/recommend/seeds", b'{"seeds": ["T1"], "weights": {"a": 1}}'),
+    ("/recommend/seeds", b'{"seeds": ["T1"], "weights": [1' + b"0" * 400 + b"]}"),
+])
+def test_bad_bodies_get_400(server, path, body):
+    status, reply = request(server, "POST", path, body)
+    assert status == 400
+    assert "error" in reply
+
+
+def test_good_body_gets_200(server):
+    status, reply = request(server, "POST", "/recommend/batch", b'{"seeds": ["T1", 1002, "missing"], "k": 3}')
+    assert status == 200
+    assert [result["found"] for result in reply["results"]] == [True, True, False]
+    assert len(reply["results"][0]["movie_ids"]) == 3
+
+
+def test_health_reports_cache_counters(tmp_path, synthetic_tags):
+    vectors = write_movies_for(tmp_path, synthetic_tags)
+    np.save(tmp_path / "similarity.npy", cosine_similarity_matrix(vectors))
+    server = start_server(tmp_path)
+    try:
+        for _ in range(3):
+            assert request(server, "GET", "/recommend?title=T1&k=3")[0] == 200
+        status, reply = request(server, "GET", "/health")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert status == 200
+    assert reply["cache"]["misses"] == 1
+    assert reply["cache"]["hits"] == 2
+    assert reply["cache"]["entries"] == 1
+
+
+def test_health_without_cache(server):
+    assert request(server, "GET", "/health") == (200, {"status": "ok"})
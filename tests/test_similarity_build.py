@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from features import cosine_similarity_matrix, vectorize_tags
+from recommender import NeighborStore
+from similarity_build import build_neighbor_store
+
+
+@pytest.mark.parametrize("block_size, tile_size, workers", [(64, None, 1), (37, 50, 1), (64, 128, 2)])
+def test_blocked_build_matches_dense(tmp_path, synthetic_tags, block_size, tile_size, workers):
+    vectors, _ = vectorize_tags(synthetic_tags)
+    expected = NeighborStore.from_dense(cosine_similarity_matrix(vectors), 20, scores_dtype=np.float32)
+
+    store = build_neighbor_store(
+        vectors, 20, str(tmp_path / "similarity_topk.npz"), block_size, tile_size, np.float32, workers
+    )
+
+    np.testing.assert_array_equal(store.indices, expected.indices)
+    np.testing.assert_allclose(store.scores, expected.scores, atol=1e-6)
+    saved = NeighborStore.load(str(tmp_path / "similarity_topk.npz"))
+    np.testing.assert_array_equal(saved.indices, store.indices)
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import read_movies, write_movies
+from features import load_tag_vectors, save_tag_vectors, vectorize_tags
+from preprocess import stem_tags
+from recommender import NeighborStore, RecommendationLists
+from similarity_build import build_neighbor_store
+from update_catalog import update_catalog
+
+K = 20
+
+
+def write_catalog(directory, movies, scores_dtype=np.float32):
+    """The artifacts build.py writes for movies, stemming their raw tags first."""
+    movies = movies.assign(tags=stem_tags(movies["tags"]))
+    vectors, vectorizer = vectorize_tags(movies["tags"])
+    write_movies(movies, os.path.join(directory, "movies.arrow"))
+    save_tag_vectors(os.path.join(directory, "tag_vectors.npz"), vectors, vectorizer.vocabulary_)
+    return build_neighbor_store(vectors, K, os.path.join(directory, "similarity_topk.npz"), scores_dtype=scores_dtype)
+
+
+def catalog(tags):
+    return pd.DataFrame({
+        "movie_id": np.arange(len(tags)) + 1000,
+        "title": [f"Movie {row}" for row in range(len(tags))],
+        "tags": tags,
+    })
+
+
+@pytest.mark.parametrize("scores_dtype", [np.float32, np.float16])
+def test_update_matches_full_rebuild(tmp_path, synthetic_tags, scores_dtype):
+    movies = catalog(synthetic_tags)
+    write_catalog(str(tmp_path), movies.iloc[:250], scores_dtype)
+
+    # 50 new movies plus three changed ones, one of them a duplicate of another movie
+    changed = movies.iloc[[3, 30, 100]].assign(tags=[synthetic_tags[260], synthetic_tags[0], "haunted pirates"])
+    updates = pd.concat([movies.iloc[250:], changed], ignore_index=True)
+    movies_df, recomputed, removed = update_catalog(updates, str(tmp_path), block_size=64)
+
+    expected = movies.copy()
+    expected.loc[[3, 30, 100], "tags"] = changed["tags"].to_numpy()
+    expected = expected.assign(tags=stem_tags(expected["tags"]))
+    _, vocabulary = load_tag_vectors(str(tmp_path / "tag_vectors.npz"))
+    vectors, _ = vectorize_tags(expected["tags"], vocabulary=vocabulary)
+    full = build_neighbor_store(vectors, K, str(tmp_path / "full.npz"), scores_dtype=scores_dtype)
+
+    store = NeighborStore.load(str(tmp_path / "similarity_topk.npz"))
+    assert store.scores.dtype == scores_dtype
+    np.testing.assert_array_equal(store.scores, full.scores)
+    np.testing.assert_array_equal(store.indices, full.indices)
+    assert 0 < recomputed < len(expected)
+    assert removed == []
+    pd.testing.assert_frame_equal(read_movies(str(tmp_path / "movies.arrow")), expected)
+    pd.testing.assert_frame_equal(movies_df, expected)
+
+
+def test_update_regenerates_or_removes_recommendation_lists(tmp_path, synthetic_tags):
+    movies = catalog(synthetic_tags)
+    store = write_catalog(str(tmp_path), movies.iloc[:250])
+    lists_path = str(tmp_path / "recommendations.npy")
+    updates = movies.iloc[250:]
+
+    narrow = NeighborStore(store.indices[:, :5], store.scores[:, :5])
+    RecommendationLists.from_neighbors(narrow).save(lists_path)
+    _, _, removed = update_catalog(updates.iloc[:25], str(tmp_path))
+    assert removed == []
+    lists = RecommendationLists.load(lists_path)
+    assert lists.lists.shape == (275, 5)
+    patched = NeighborStore.load(str(tmp_path / "similarity_topk.npz"))
+    np.testing.assert_array_equal(lists.lists, patched.indices[:, :5])
+
+    wide = RecommendationLists(np.zeros((275, K + 1), dtype=np.int32))
+    wide.save(lists_path)
+    _, _, removed = update_catalog(updates.iloc[25:], str(tmp_path))
+    assert removed == ["recommendations.npy"]
+    assert not os.path.exists(lists_path)
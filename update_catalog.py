@@ -0,0 +1,208 @@
+"""Add new or changed movies to the catalog without rebuilding every similarity.
+
+    python update_catalog.py new_movies.csv       # movie_id, title and tags columns
+
+Incoming tags are raw, like preprocess.make_tags produces them; they are
+stemmed here, the same way build.py stems the catalog. Only the incoming
+movies are vectorized, with the vocabulary frozen in tag_vectors.npz by
+similarity_build.py, and scored against the catalog. Every
+other neighbor list is patched with its similarity to those movies; only lists
+that contained a changed movie are recomputed in full. The movie data
+(movies.arrow, or the legacy movies.pkl), tag_vectors.npz, similarity_topk.npz
+and, when present, recommendations.npy and ann_index.npz are rewritten together.
+"""
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from catalog import ArtifactError, find_movies, read_movies, write_movies
+from features import load_tag_vectors, normalize_rows, save_tag_vectors, vectorize_tags
+from preprocess import stem_tags
+from recommender import NeighborStore, RecommendationLists, top_k_rows
+from similarity_build import block_top_k, merge_top_k
+
+
+def merge_movies(movies_df, new_df):
+    """Replace movies whose id is already known and append the rest.
+
+    Returns new_df without duplicate ids, the updated catalog and, for every
+    row of new_df, the catalog row it now occupies.
+    """
+    new_df = new_df.drop_duplicates("movie_id", keep="last").reset_index(drop=True)
+    existing = {}
+    for row, movie_id in enumerate(movies_df["movie_id"].tolist()):
+        existing.setdefault(movie_id, row)
+
+    rows = np.array([existing.get(movie_id, -1) for movie_id in new_df["movie_id"].tolist()], dtype=np.intp)
+    added = rows < 0
+    rows[added] = len(movies_df) + np.arange(added.sum())
+
+    movies_df = movies_df.copy()
+    columns = ["movie_id", "title", "tags"]
+    movies_df.loc[rows[~added], columns] = new_df.loc[~added, columns].to_numpy()
+    movies_df = pd.concat([movies_df, new_df.loc[added, columns]], ignore_index=True)
+    return new_df, movies_df, rows
+
+
+def patch_neighbor_store(store, normalized, touched, block_size=4096, tile_size=None):
+    """Return the neighbor store of normalized after the rows in touched changed or were added.
+
+    Rows of the old store that listed a changed movie are recomputed, since
+    its old score may have kept a better neighbor out. Every other old row
+    only needs its similarity to the touched movies merged in.
+    """
+    n = normalized.shape[0]
+    old = len(store)
+    k = store.max_k
+    tile_size = tile_size or n
+    transposed = sparse.csc_matrix(normalized.T)
+
+    changed = touched[touched < old]
+    recompute = np.isin(store.indices, changed).any(axis=1)
+    recompute[changed] = True
+    recompute = np.union1d(recompute.nonzero()[0], touched)
+
+    indices = np.empty((n, k), dtype=store.indices.dtype)
+    scores = np.empty((n, k), dtype=store.scores.dtype)
+
+    patch = np.setdiff1d(np.arange(old), recompute)
+    candidates = transposed[:, touched]
+    for start in range(0, len(patch), block_size):
+        rows = patch[start:start + block_size]
+        # Ranked at the stored precision, like block_top_k, so ties break as in a rebuild
+        tile = (normalized[rows] @ candidates).toarray().astype(store.scores.dtype, copy=False)
+        ranked = top_k_rows(tile, k)
+        merged_indices, merged_scores = merge_top_k(
+            store.indices[rows], store.scores[rows], touched[ranked], np.take_along_axis(tile, ranked, axis=1), k
+        )
+        indices[rows] = merged_indices
+        scores[rows] = merged_scores
+
+    for start in range(0, len(recompute), block_size):
+        rows = recompute[start:start + block_size]
+        indices[rows], scores[rows] = block_top_k(
+            normalized, transposed, rows, k, tile_size, store.scores.dtype
+        )
+
+    return NeighborStore(indices, scores), len(recompute)
+
+
+def read_updates(path):
+    if path.endswith(".csv"):
+        new_df = pd.read_csv(path)
+    else:
+        with open(path, "rb") as f:
+            new_df = pickle.load(f)
+
+    missing = {"movie_id", "title", "tags"} - set(new_df.columns)
+    if missing:
+        raise ValueError(f"{path} lacks the columns: {', '.join(sorted(missing))}")
+    return new_df
+
+
+def temporary_path(path):
+    """Sibling path with the same extension, so np.save/np.savez do not append their own."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.tmp{ext}"
+
+
+def update_catalog(new_df, directory=".", block_size=4096, tile_size=None):
+    """Fold new_df into the artifacts in directory.
+
+    Returns the updated movies, the number of recomputed neighbor lists and
+    the names of artifacts that were removed because they could not be kept
+    up to date.
+    """
+
+    def path(name):
+        return os.path.join(directory, name)
+
+    for name in ("tag_vectors.npz", "similarity_topk.npz"):
+        if not os.path.exists(path(name)):
+            raise ArtifactError(f"File not found: {path(name)} (build it with similarity_build.py)")
+
+    movies_path = find_movies(directory)
+    movies_df = read_movies(movies_path).reset_index(drop=True)
+    vectors, vocabulary = load_tag_vectors(path("tag_vectors.npz"))
+    store = NeighborStore.load(path("similarity_topk.npz"))
+    if not len(movies_df) == vectors.shape[0] == len(store):
+        raise ArtifactError(
+            f"Catalog artifacts are out of sync: {len(movies_df)} movies, "
+            f"{vectors.shape[0]} vectors, {len(store)} neighbor lists"
+        )
+
+    # The frozen vocabulary holds stems, so incoming words must be stemmed to match it
+    new_df = new_df.assign(tags=stem_tags(new_df["tags"].astype(str)))
+    new_df, movies_df, touched = merge_movies(movies_df, new_df)
+    new_vectors, _ = vectorize_tags(new_df["tags"], vocabulary=vocabulary)
+
+    # Row i of the catalog comes from the old vectors, or from new_vectors when touched
+    source = np.arange(len(movies_df))
+    source[touched] = vectors.shape[0] + np.arange(len(touched))
+    vectors = sparse.csr_matrix(sparse.vstack([vectors, new_vectors])[source])
+
+    touched = np.unique(touched)
+    store, recomputed = patch_neighbor_store(store, normalize_rows(vectors), touched, block_size, tile_size)
+
+    # Write everything first, then swap it in, so a failure leaves the old catalog intact
+    if movies_path.endswith(".arrow"):
+        writes = [("movies.arrow", lambda p: write_movies(movies_df, p))]
+    else:
+        writes = [("movies.pkl", lambda p: movies_df.to_pickle(p))]
+    writes.append(("tag_vectors.npz", lambda p: save_tag_vectors(p, vectors, vocabulary)))
+    writes.append(("similarity_topk.npz", store.save))
+    removed = []
+    if os.path.exists(path("recommendations.npy")):
+        m = RecommendationLists.load(path("recommendations.npy")).max_k
+        if m <= store.max_k:
+            lists = RecommendationLists.from_neighbors(NeighborStore(store.indices[:, :m], store.scores[:, :m]))
+            writes.append(("recommendations.npy", lists.save))
+        else:
+            # Lists wider than the neighbor store cannot be patched; serve the store instead
+            removed.append("recommendations.npy")
+    if os.path.exists(path("ann_index.npz")):
+        from ann import IVFIndex
+
+        index = IVFIndex.load(path("ann_index.npz")).updated(vectors, touched)
+        writes.append(("ann_index.npz", index.save))
+
+    for name, save in writes:
+        save(temporary_path(path(name)))
+    for name, _ in writes:
+        os.replace(temporary_path(path(name)), path(name))
+    for name in removed:
+        os.remove(path(name))
+
+    return movies_df, recomputed, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("movies", help="CSV or pickle of new/changed movies with movie_id, title and tags")
+    parser.add_argument("--data-dir", default=".", help="directory holding the catalog artifacts")
+    parser.add_argument("--block-size", type=int, default=4096, help="rows patched at once")
+    parser.add_argument("--tile-size", type=int, default=0, help="columns scored at once (default: all)")
+    args = parser.parse_args()
+
+    try:
+        new_df = read_updates(args.movies)
+        movies_df, recomputed, removed = update_catalog(
+            new_df, args.data_dir, args.block_size, args.tile_size or None
+        )
+    except (ArtifactError, ValueError) as e:
+        parser.exit(1, f"❌ {str(e)}\n")
+
+    print(f"Catalog now holds {len(movies_df)} movies; {recomputed} neighbor lists recomputed, the rest patched")
+    for name in removed:
+        print(f"Warning: removed {name}; it was wider than the neighbor store, which is served instead")
+    for name in ("similarity.npy", "similarity.pkl"):
+        if os.path.exists(os.path.join(args.data_dir, name)):
+            print(f"Note: {name} was not updated; similarity_topk.npz takes precedence over it")
+
+
+if __name__ == "__main__":
+    main()